@@ -1,15 +1,15 @@
 # build_llm.py
-from dotenv import load_dotenv
-import os
-from langchain_groq import ChatGroq
-from pydantic import BaseModel, Field
-
-load_dotenv()
+from Core.env import getenv
+from Core.transport import httpx_client, endpoint_config
 
 def build_llm():
-    model = os.getenv("GROQ_MODEL", "openai/gpt-oss-20b") 
+    from langchain_groq import ChatGroq  # ~1 s to import, so only when a client is built
+    model = getenv("GROQ_MODEL", "openai/gpt-oss-20b")
+    # Reuse one pooled (HTTP/2 if available) connection to Groq across turns
+    cfg = endpoint_config("llm")
+    transport = dict(http_client=httpx_client("llm"), max_retries=cfg.retries, timeout=cfg.read_timeout)
     # If ChatGroq supports max_tokens, keep responses short; otherwise rely on prompt.
     try:
-        return ChatGroq(model=model, temperature=0.2, max_tokens=128)
+        return ChatGroq(model=model, temperature=0.2, max_tokens=128, **transport)
     except TypeError:
-        return ChatGroq(model=model, temperature=0.2)
+        return ChatGroq(model=model, temperature=0.2, **transport)
@@ -1,5 +1,118 @@
-from langchain.memory import ConversationBufferMemory
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import HumanMessage, SystemMessage
+from Core.scheduler import BATCH, scheduler
 
-def build_memory():
-    memory = ConversationBufferMemory(memory_key="history", return_messages=True)
-    return memory
+SUMMARY_PROMPT = (
+    "You keep the running memory of a voice assistant's conversation. "
+    "Merge the new lines into the current summary. Keep names, facts, preferences "
+    "and open questions; drop small talk. Reply with the summary only, at most 5 short sentences."
+)
+
+# shared by every memory so many conversations don't mean many threads
+_summarizer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+
+def count_tokens(messages) -> int:
+    # ~4 characters per token plus per-message overhead; close enough for budgeting
+    return sum(len(m.content) // 4 + 4 for m in messages)
+
+
+class RollingSummaryMemory:
+    """
+    Bounded conversation memory.
+    The last keep_turns exchanges stay verbatim; anything older (or anything that
+    pushes the history over token_budget) is folded into a running summary by a
+    background thread, so summarization never blocks a turn.
+    Drop-in for the ConversationBufferMemory calls qa.py makes.
+    - llm: model used for summaries; without one, old turns are simply dropped
+    """
+
+    def __init__(self, llm=None, token_budget: int = 1500, keep_turns: int = 4):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.keep_messages = 2 * keep_turns
+        self.messages = []
+        self.summary = ""
+        self.prompt_tokens = deque(maxlen=1000)  # estimated prompt size of every turn
+        self._pending = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def chat_memory(self):
+        return self
+
+    def add_message(self, message):
+        with self._lock:
+            self.messages.append(message)
+            self._fold_old_messages()
+            start = bool(self._pending) and self.llm is not None and not self._running
+            if start:
+                self._running = True
+        if start:
+            _summarizer.submit(self._summarize)
+
+    def load_memory_variables(self, inputs=None) -> dict:
+        with self._lock:
+            history = list(self.messages)
+            if self.summary:
+                history.insert(0, SystemMessage(content=f"Earlier in this conversation: {self.summary}"))
+        return {"history": history}
+
+    def record_prompt(self, messages) -> int:
+        n = count_tokens(messages)
+        self.prompt_tokens.append(n)
+        return n
+
+    def clear(self):
+        with self._lock:
+            self.messages = []
+            self._pending = []
+            self.summary = ""
+
+    # ---------- Summarization ----------
+
+    def _fold_old_messages(self):
+        def over_budget():
+            return count_tokens(self.messages) + len(self.summary) // 4 > self.token_budget
+
+        # always keep the newest exchange verbatim
+        while len(self.messages) > 2 and (len(self.messages) > self.keep_messages or over_budget()):
+            old = self.messages.pop(0)
+            if self.llm is not None:
+                self._pending.append(old)
+
+    def _summarize(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                summary = self.summary
+                if not batch:
+                    self._running = False
+                    return
+
+            lines = "\n".join(
+                f"{'User' if isinstance(m, HumanMessage) else 'Jessica'}: {m.content}" for m in batch
+            )
+            try:
+                with scheduler.priority(BATCH):  # never ahead of a live turn
+                    reply = self.llm.invoke([
+                        SystemMessage(content=SUMMARY_PROMPT),
+                        HumanMessage(content=f"Current summary:\n{summary or '(empty)'}\n\nNew lines:\n{lines}"),
+                    ])
+                with self._lock:
+                    self.summary = reply.content.strip()
+            except Exception as e:
+                print("Summary error:", e)
+
+
+def build_memory(llm=None, token_budget: int = None, keep_turns: int = None):
+    """Bounded rolling-summary memory; budget and window come from the env by default."""
+    if token_budget is None:
+        token_budget = int(os.getenv("JESSICA_MEMORY_TOKENS", "1500"))
+    if keep_turns is None:
+        keep_turns = int(os.getenv("JESSICA_MEMORY_TURNS", "4"))
+    return RollingSummaryMemory(llm=llm, token_budget=token_budget, keep_turns=keep_turns)
@@ -1,26 +1,39 @@
 # qa.py
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from .llm_memory import build_memory
-
-memory = build_memory()
-
-def ask_jessica(llm, question: str) -> str:
-    system = SystemMessage(
-        content=(
-            """ You are a Jarvis assistant, you know well how that was in Marvel movies,
-            I want you to give human like response for the questions given for you.
-            Sometimes initiate in the conversation but not give a large or medium reponse.
-            Keep it short along with Human behaviour. According to the conversation or talk
-            keep your mood accordingly. But most of the time keep yourself funnier
-            Just again make sure don't give response like AI because you know how long they 
-            give their response.
-            
-            So overall just give a human like response not an AI like and along don't give lengthy 
-            reponses. Don't use emoji's and all anything which human don't speak while conversation like 
-            he nevers tell "laughing emoji with showing hands". Do not do that anyhow.
-            """
-        )
+from Core import tracing
+from Core.scheduler import scheduler
+from .sessions import SessionManager
+
+# one memory per conversation; callers that don't pass a session share "default"
+sessions = SessionManager()
+
+SYSTEM_PROMPT = SystemMessage(
+    content=(
+        """ You are a Jarvis assistant, you know well how that was in Marvel movies,
+        I want you to give human like response for the questions given for you.
+        Sometimes initiate in the conversation but not give a large or medium reponse.
+        Keep it short along with Human behaviour. According to the conversation or talk
+        keep your mood accordingly. But most of the time keep yourself funnier
+        Just again make sure don't give response like AI because you know how long they 
+        give their response.
+        
+        So overall just give a human like response not an AI like and along don't give lengthy 
+        reponses. Don't use emoji's and all anything which human don't speak while conversation like 
+        he nevers tell "laughing emoji with showing hands". Do not do that anyhow.
+        """
     )
+)
+
+
+def _prepare_messages(llm, memory, question: str, commit: bool = True):
+    # old turns get summarized by the same model that answers
+    if memory.llm is None:
+        memory.llm = llm
+
+    if not commit:
+        # preview: the question is only appended to a copy of the history
+        history = memory.load_memory_variables({})["history"]
+        return [SYSTEM_PROMPT] + history + [HumanMessage(content=question)]
 
     # add user message into memory
     memory.chat_memory.add_message(HumanMessage(content=question))
@@ -29,12 +42,97 @@ def ask_jessica(llm, question: str) -> str:
     history = memory.load_memory_variables({})["history"]
 
     # final messages = system prompt + history
-    messages = [system] + history
+    messages = [SYSTEM_PROMPT] + history
+    memory.record_prompt(messages)
+    return messages
+
+
+def _cached_answer(cache, memory, question: str, commit: bool = True):
+    """Returns (answer or None, context); a hit is recorded in memory like a normal turn."""
+    context = memory.load_memory_variables({})["history"]
+    answer = cache.lookup(question, context)
+    if answer is not None and commit:
+        memory.chat_memory.add_message(HumanMessage(content=question))
+        memory.chat_memory.add_message(AIMessage(content=answer))
+    return answer, context
+
+
+def ask_jessica(llm, question: str, session=None, cache=None) -> str:
+    """
+    - session: a Session from qa.sessions (or a session id); one llm can serve
+      any number of sessions concurrently
+    - cache: optional ResponseCache consulted before calling the LLM
+    """
+    with sessions.turn(session) as session:
+        if cache is not None:
+            answer, context = _cached_answer(cache, session.memory, question)
+            if answer is not None:
+                return answer
 
-    # send to LLM
-    response = llm.invoke(messages)
+        messages = _prepare_messages(llm, session.memory, question)
 
-    # Save AI’s reply back into memory
-    memory.chat_memory.add_message(AIMessage(content=response.content))
+        # send to LLM; sessions asking the same thing at once (e.g. fresh
+        # sessions with the same opener) share one request
+        tracing.mark("llm_start")
+        key = ("llm", id(llm)) + tuple((m.type, m.content) for m in messages)
+        response = scheduler.coalesce(key, lambda: llm.invoke(messages))
+        # no first token to time on a blocking call: only llm_total covers it
+        tracing.mark("llm_last_token", last=True)
+
+        # Save AI’s reply back into memory
+        session.memory.chat_memory.add_message(AIMessage(content=response.content))
+        if cache is not None:
+            cache.store(question, context, response.content)
 
     return response.content
+
+
+def stream_jessica(llm, question: str, session=None, cache=None, commit: bool = True):
+    """
+    Same as ask_jessica, but yields the reply token by token as Groq streams it.
+    The full reply is written to memory once the stream is exhausted.
+    A cache hit is yielded as a single chunk.
+    - commit: False generates a preview (e.g. from an interim transcript) that
+      leaves memory and cache untouched; keep it with commit_reply()
+    The session stays locked until the generator is exhausted or closed, so a
+    caller that stops early must close() it (or iterate under contextlib.closing).
+    """
+    with sessions.turn(session) as session:
+        if cache is not None:
+            answer, context = _cached_answer(cache, session.memory, question, commit)
+            if answer is not None:
+                yield answer
+                return
+
+        messages = _prepare_messages(llm, session.memory, question, commit)
+
+        parts = []
+        tracing.mark("llm_start")
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                if not parts:
+                    tracing.mark("llm_first_token")
+                parts.append(chunk.content)
+                yield chunk.content
+        tracing.mark("llm_last_token", last=True)
+
+        # Save the whole reply back into memory only when the stream finished
+        if commit:
+            reply = "".join(parts)
+            session.memory.chat_memory.add_message(AIMessage(content=reply))
+            if cache is not None:
+                cache.store(question, context, reply)
+
+
+def commit_reply(question: str, reply: str = None, session=None, cache=None):
+    """
+    Record a turn generated with commit=False as if it had been a normal one.
+    - reply: None if the reply was cut off before it finished (only the question is kept)
+    """
+    with sessions.turn(session) as session:
+        context = session.memory.load_memory_variables({})["history"]
+        session.memory.chat_memory.add_message(HumanMessage(content=question))
+        if reply is not None:
+            session.memory.chat_memory.add_message(AIMessage(content=reply))
+            if cache is not None:
+                cache.store(question, context, reply)
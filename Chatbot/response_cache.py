@@ -0,0 +1,131 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def embed(text: str, dim: int = 256) -> np.ndarray:
+    """
+    Offline embedding: hashed bag of words and character trigrams, L2-normalized.
+    Good enough to match rephrasings like "what's the time" / "what time is it".
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    norm = normalize_question(text)
+    for word in norm.split():
+        vec[zlib.crc32(word.encode()) % dim] += 1.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vec[zlib.crc32(padded[i:i + 3].encode()) % dim] += 0.5
+    n = np.linalg.norm(vec)
+    return vec / n if n else vec
+
+
+def context_hash(history, messages: int = 2) -> int:
+    """Short hash of the last few messages, so answers are only reused in a similar context."""
+    if messages <= 0 or not history:
+        return 0
+    recent = "\x1e".join(normalize_question(m.content) for m in history[-messages:])
+    return zlib.crc32(recent.encode())
+
+
+class ResponseCache:
+    """
+    Opt-in cache in front of llm.invoke.
+    Lookups try the exact (context, normalized question) key first, then the
+    nearest neighbour among entries with the same context hash, using cosine
+    similarity over a preallocated NumPy matrix of embeddings.
+    - threshold: minimum cosine similarity for a nearest-neighbour hit
+    - ttl: seconds an answer stays valid
+    - max_entries: LRU capacity (also the size of the vector index)
+    - context_messages: how many recent messages go into the context hash
+    """
+
+    def __init__(self, threshold: float = 0.85, ttl: float = 3600.0, max_entries: int = 1024,
+                 context_messages: int = 2, dim: int = 256, embed_fn=embed):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.context_messages = context_messages
+        self.embed_fn = lambda text: embed_fn(text, dim)
+
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._contexts = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)  # 0 = free slot
+        self._answers = [None] * max_entries
+        self._keys = [None] * max_entries
+        self._slots = OrderedDict()  # (context, question) -> slot, in LRU order
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def lookup(self, question: str, history=None):
+        """Cached answer for question in this context, or None."""
+        ctx = context_hash(history, self.context_messages)
+        key = (ctx, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None and self._expires[slot] > now:
+                self._slots.move_to_end(key)
+                self.exact_hits += 1
+                return self._answers[slot]
+
+            if self._slots:
+                q = self.embed_fn(question)
+                sims = self._vectors @ q
+                valid = (self._expires > now) & (self._contexts == ctx)
+                sims[~valid] = -1.0
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    self._slots.move_to_end(self._keys[best])
+                    self.semantic_hits += 1
+                    return self._answers[best]
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, history, answer: str):
+        ctx = context_hash(history, self.context_messages)
+        key = (ctx, normalize_question(question))
+        vec = self.embed_fn(question)
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                if not self._free:
+                    _, old = self._slots.popitem(last=False)
+                    self._release(old)
+                slot = self._free.pop()
+            self._slots[key] = slot
+            self._vectors[slot] = vec
+            self._contexts[slot] = ctx
+            self._expires[slot] = time.time() + self.ttl
+            self._answers[slot] = answer
+            self._keys[slot] = key
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else None,
+            }
+
+    def _release(self, slot: int):
+        self._expires[slot] = 0.0
+        self._answers[slot] = None
+        self._keys[slot] = None
+        self._free.append(slot)
@@ -0,0 +1,129 @@
+import contextlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .llm_memory import build_memory, count_tokens
+
+
+@dataclass
+class Session:
+    id: str
+    memory: object
+    # held for the whole of a turn, so one conversation's turns never interleave
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # turns holding or waiting for the lock; counted under the manager lock
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+    def size_tokens(self) -> int:
+        history = self.memory.load_memory_variables({})["history"]
+        return count_tokens(history)
+
+
+class SessionManager:
+    """
+    Conversations keyed by session id, each with its own memory.
+    Sessions idle for longer than idle_timeout seconds are dropped, and the
+    least recently used ones go first once max_sessions or max_total_tokens
+    (history held across all sessions) is exceeded. Sessions in the middle of
+    a turn are never evicted.
+    """
+
+    def __init__(self, memory_factory=build_memory, idle_timeout: float = 1800.0,
+                 max_sessions: int = 1000, max_total_tokens: int = 2_000_000):
+        self.memory_factory = memory_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_total_tokens = max_total_tokens
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.evicted = 0
+
+    def get(self, session_id: str = None, hold: bool = False) -> Session:
+        """
+        Return the session for session_id, creating it (with a fresh id if None).
+        - hold: mark it in use before the manager lock is released, so it can't be
+          evicted before the caller takes session.lock; undo with release()
+        """
+        session_id = session_id or uuid.uuid4().hex
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, self.memory_factory())
+                self._sessions[session_id] = session
+            if hold:
+                session.users += 1
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict()
+        return session
+
+    def release(self, session: Session):
+        with self._lock:
+            session.users -= 1
+            session.last_used = time.monotonic()
+
+    @contextlib.contextmanager
+    def turn(self, session=None):
+        """
+        Hold a session (a Session or a session id, "default" if None) for one
+        turn: its lock is taken and it is not evicted until the block exits.
+        """
+        if session is None or isinstance(session, str):
+            session = self.get(session or "default", hold=True)
+        else:
+            with self._lock:
+                session.users += 1
+        try:
+            with session.lock:
+                yield session
+        finally:
+            self.release(session)
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "total_tokens": sum(s.size_tokens() for s in sessions),
+            "evicted": self.evicted,
+        }
+
+    def _evict(self):
+        # Full sweeps (idle + token cap) walk every session, so at most once a second
+        now = time.monotonic()
+        sweep = now - self._last_sweep > 1.0
+        if sweep:
+            self._last_sweep = now
+            for sid, s in list(self._sessions.items()):
+                if now - s.last_used > self.idle_timeout and not s.users:
+                    del self._sessions[sid]
+                    self.evicted += 1
+
+        if len(self._sessions) <= self.max_sessions and not sweep:
+            return
+
+        # Oldest first; the newest session (just touched) is last in the dict
+        candidates = [sid for sid, s in self._sessions.items() if not s.users][:-1]
+        while len(self._sessions) > self.max_sessions and candidates:
+            del self._sessions[candidates.pop(0)]
+            self.evicted += 1
+
+        if sweep and self.max_total_tokens and candidates:
+            total = sum(s.size_tokens() for s in self._sessions.values())
+            while total > self.max_total_tokens and candidates:
+                sid = candidates.pop(0)
+                if sid in self._sessions:
+                    total -= self._sessions.pop(sid).size_tokens()
+                    self.evicted += 1
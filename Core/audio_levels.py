@@ -0,0 +1,233 @@
+# audio_levels.py
+# Per-block audio levels (RMS + FFT band energies) published by the mic
+# capture and TTS playback into fixed-size NumPy ring buffers, for the HUD
+# to read without ever taking a lock. Set JESSICA_AUDIO_SHM to the same name
+# (e.g. "jessica_audio") for the assistant and gui.py to share them through
+# SharedMemory across processes; a block has one publishing process at a time.
+
+import atexit
+import os
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from Core.env import getenv
+
+SLOTS = 64      # ~2 s of 30 ms blocks
+BANDS = 24      # one per bar in the HUD bar chart
+MIN_HZ = 80.0
+MAX_HZ = 8000.0
+SOURCES = ("mic", "playback")
+
+_MAGIC = 0x4A455353  # "JESS"
+
+
+def shm_name() -> str:
+    """JESSICA_AUDIO_SHM, read when first needed so a .env value counts; "" = in-process only."""
+    return getenv("JESSICA_AUDIO_SHM", "")
+
+
+class LevelRing:
+    """
+    Single-writer ring of (time, rms, bands) slots over a preallocated buffer.
+    The writer fills slot seq % slots and only then bumps seq; a reader copies
+    the newest slot and re-reads seq, retrying if the writer lapped onto it
+    meanwhile. A seqlock without a lock: it needs exactly one writer, and
+    across processes nothing orders the stores, so on weakly ordered CPUs a
+    reader can rarely see a mixed slot (a glitched meter frame, nothing worse).
+    - buf: memory to lay the ring out in (a SharedMemory buffer or bytearray)
+    """
+
+    def __init__(self, buf, slots: int = SLOTS, bands: int = BANDS, offset: int = 0):
+        self.slots = slots
+        self.bands = bands
+        self._seq = np.ndarray((1,), np.int64, buf, offset)
+        offset += 8
+        self.t = np.ndarray((slots,), np.float64, buf, offset)
+        offset += 8 * slots
+        self.rms = np.ndarray((slots,), np.float32, buf, offset)
+        offset += 4 * slots
+        self.band = np.ndarray((slots, bands), np.float32, buf, offset)
+        self._plans = {}  # (block length, samplerate) -> (window, band index per bin)
+
+    @staticmethod
+    def nbytes(slots: int = SLOTS, bands: int = BANDS) -> int:
+        return 8 + 8 * slots + 4 * slots + 4 * slots * bands
+
+    @property
+    def seq(self) -> int:
+        return int(self._seq[0])
+
+    # ---------- Writer (audio thread / callback) ----------
+
+    def publish(self, samples: np.ndarray, samplerate: int):
+        """Compute levels of one mono or multi-channel block (integer or float samples) and publish them."""
+        x = np.asarray(samples)
+        if x.ndim > 1:
+            x = x[:, 0]
+        n = len(x)
+        if n < 2:
+            return
+        full_scale = np.iinfo(x.dtype).max + 1 if np.issubdtype(x.dtype, np.integer) else 1.0
+        x = x.astype(np.float32)
+        x *= 1.0 / full_scale
+
+        window, bins = self._plan(n, samplerate)
+        mag = np.abs(np.fft.rfft(x * window)) * (2.0 / n)
+        energy = np.bincount(bins, weights=mag, minlength=self.bands + 1)[:self.bands]
+        # dB over a 60 dB range -> 0..1
+        energy = np.clip((20 * np.log10(energy + 1e-9) + 60) / 60, 0.0, 1.0)
+
+        seq = self.seq
+        i = seq % self.slots
+        self.t[i] = time.monotonic()
+        self.rms[i] = np.sqrt(np.dot(x, x) / n)
+        self.band[i] = energy
+        self._seq[0] = seq + 1
+
+    def _plan(self, n: int, samplerate: int):
+        plan = self._plans.get((n, samplerate))
+        if plan is None:
+            freqs = np.fft.rfftfreq(n, 1.0 / samplerate)
+            edges = np.geomspace(MIN_HZ, min(MAX_HZ, samplerate / 2), self.bands + 1)
+            bins = np.searchsorted(edges, freqs, side="right") - 1
+            bins[(bins < 0) | (bins >= self.bands)] = self.bands  # out of range -> dropped
+            plan = self._plans[(n, samplerate)] = (np.hanning(n).astype(np.float32), bins)
+        return plan
+
+    # ---------- Reader (HUD) ----------
+
+    def latest(self, max_age: float = 0.25):
+        """(rms, bands copy) of the newest block, or None if nothing fresher than max_age s."""
+        for _ in range(3):
+            seq = self.seq
+            if seq == 0:
+                return None
+            i = (seq - 1) % self.slots
+            t, rms, bands = float(self.t[i]), float(self.rms[i]), self.band[i].copy()
+            if self.seq - seq < self.slots - 1:  # writer didn't lap onto slot i meanwhile
+                if time.monotonic() - t > max_age:
+                    return None
+                return rms, bands
+        return None
+
+
+class AudioLevels:
+    """
+    One LevelRing per source ("mic", "playback") in a single memory block.
+    - name: SharedMemory name to create or attach to; None keeps it in-process
+    """
+
+    def __init__(self, name: str = None, slots: int = SLOTS, bands: int = BANDS, create: bool = True):
+        ring_bytes = LevelRing.nbytes(slots, bands)
+        size = 32 + ring_bytes * len(SOURCES)
+        self._shm = None
+        self._owner = False
+        if name:
+            self._shm, self._owner = _open_shared(name, size, create)
+            buf = self._shm.buf
+        else:
+            buf = bytearray(size)
+
+        # magic, slots, bands, pid of the publishing process
+        header = self._header = np.ndarray((4,), np.int64, buf, 0)
+        writer = int(header[3]) if header[0] == _MAGIC else 0
+        error = None
+        if header[0] == _MAGIC and (header[1], header[2]) != (slots, bands):
+            error = "has a different layout"
+        elif create and self._shm is not None and writer not in (0, os.getpid()) and _alive(writer):
+            error = f"is already published by process {writer}"
+        if error:
+            del header  # no views may be left when the block is closed
+            self.close()
+            raise ValueError(f"audio level block {name!r} {error}")
+        if create:
+            header[1:3] = (slots, bands)
+            header[3] = os.getpid()
+            header[0] = _MAGIC
+        for k, source in enumerate(SOURCES):
+            setattr(self, source, LevelRing(buf, slots, bands, 32 + k * ring_bytes))
+
+    def close(self):
+        """Detach; the process that created the shared block also unlinks it."""
+        if self._shm is not None:
+            if self._header[3] == os.getpid():
+                self._header[3] = 0
+            # drop views before closing the buffer
+            self.mic = self.playback = self._header = None
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+
+def _open_shared(name: str, size: int, create: bool):
+    if create:
+        try:
+            return shared_memory.SharedMemory(name, create=True, size=size), True
+        except FileExistsError:
+            pass  # left over from another run (or another publisher): reuse it
+    shm = _attach(name)
+    if shm.size < size:
+        shm.close()
+        raise ValueError(f"audio level block {name!r} is too small")
+    return shm, False
+
+
+def _attach(name: str):
+    """Open an existing block without this process unlinking it when it exits."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    shm = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        # the tracker registered it under the "/"-prefixed POSIX name
+        try:
+            resource_tracker.unregister("/" + shm.name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # Windows frees a block with its last handle, so an open one has a live owner
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_levels = None
+_init_lock = threading.Lock()  # only taken until the publisher exists
+
+
+def levels() -> AudioLevels:
+    """Process-wide publisher, created on first use (shared under shm_name() when set)."""
+    global _levels
+    if _levels is None:
+        with _init_lock:
+            if _levels is None:
+                try:
+                    _levels = AudioLevels(shm_name() or None)
+                except (OSError, ValueError) as e:
+                    print("⚠️ Audio levels not shared:", e)
+                    _levels = AudioLevels(None)
+                atexit.register(_levels.close)
+    return _levels
+
+
+def attach(name: str = None):
+    """Reader side (HUD): attach to the publisher's block, or None if it isn't running."""
+    name = shm_name() if name is None else name
+    if not name:
+        return None
+    try:
+        return AudioLevels(name, create=False)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,35 @@
+# env.py
+# .env loading and API key lookup, done on first use rather than at import
+# so modules can be imported (and tested, benchmarked) without keys.
+
+import os
+
+ELEVENLABS_API_BASE = "https://api.elevenlabs.io"
+
+_loaded = False
+
+
+def load_env():
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def getenv(name: str, default: str = None) -> str:
+    load_env()
+    return os.getenv(name, default)
+
+
+def require(name: str) -> str:
+    """Value of an environment variable that must be set (e.g. an API key)."""
+    value = getenv(name)
+    if not value:
+        raise ValueError(f"❌ {name} not found in .env file!")
+    return value
+
+
+def elevenlabs_url(path: str) -> str:
+    """ElevenLabs endpoint; ELEVENLABS_API_BASE points every call elsewhere (e.g. a local mock)."""
+    return getenv("ELEVENLABS_API_BASE", ELEVENLABS_API_BASE).rstrip("/") + path
@@ -0,0 +1,454 @@
+# orchestrator.py
+# asyncio assistant loop: capture -> transcribe -> think -> speak run as
+# separate stages joined by bounded queues, so the mic keeps listening while
+# Jessica talks and new speech can cut her off (barge-in). A pause mid-utterance
+# starts the LLM speculatively on an interim transcript; the reply is used
+# only if the final transcript matches.
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from Chatbot.qa import commit_reply, stream_jessica
+from Chatbot.response_cache import normalize_question
+from Core import tracing
+from Core.audio_levels import levels
+from SpeechRecog.stt_backends import default_backend
+from SpeechRecog.text_to_speech import speak_text
+from SpeechRecog.tts_pipeline import SpeechPipeline
+from SpeechRecog.vad import VoiceActivityDetector
+
+EXIT_WORDS = {"exit", "quit", "bye"}
+
+_END = object()
+
+
+class StageQueue:
+    """
+    Bounded asyncio.Queue that stamps every item on put(), so the time it sat
+    waiting for the next stage (the handoff latency) is recorded on get().
+    """
+
+    def __init__(self, maxsize: int, waits: deque):
+        self._q = asyncio.Queue(maxsize=maxsize)
+        self.waits = waits
+
+    async def put(self, item):
+        await self._q.put((time.perf_counter(), item))
+
+    def put_nowait(self, item):
+        """Used for the capture thread: never block it. Returns the oldest item if it had to go."""
+        dropped = None
+        if self._q.full():
+            _, dropped = self._q.get_nowait()
+        self._q.put_nowait((time.perf_counter(), item))
+        return dropped
+
+    def drain(self) -> list:
+        """Remove and return everything still queued."""
+        items = []
+        while not self._q.empty():
+            items.append(self._q.get_nowait()[1])
+        return items
+
+    async def get(self):
+        t, item = await self._q.get()
+        self.waits.append(time.perf_counter() - t)
+        return item
+
+
+class Speculation:
+    """
+    A reply started from an interim transcript before the final one is in.
+    Tokens pile up in an unbounded queue until the final transcript either
+    adopts it (hit) or drops it (waste); it is generated with commit=False,
+    so memory only sees it after a hit.
+    """
+
+    def __init__(self, turn):
+        self.turn = turn
+        self.text = None
+        self.tokens = asyncio.Queue()
+        self.cancelled = threading.Event()
+        self.trace = tracing.Turn()  # LLM marks; merged into turn on a hit
+        self.task = None             # interim transcription, then LLM start
+        self.interim = False         # the interim STT request went out
+        self.thinker = None          # the LLM thread, once started
+
+    def matches(self, text: str) -> bool:
+        return (self.thinker is not None and not self.cancelled.is_set()
+                and normalize_question(self.text) == normalize_question(text))
+
+
+class Assistant:
+    """
+    - backend_factory: returns a fresh TranscriptionBackend per utterance
+    - barge_in: new speech cancels the reply being generated/spoken
+    - barge_in_ratio: VAD threshold multiplier while Jessica is talking, so her
+      own voice leaking into the mic doesn't count as the user interrupting
+    - queue_size: capacity of the capture->stt and stt->llm queues
+    - speculate: after pause_ms of silence inside an utterance, transcribe what
+      was said so far and start the LLM on it while the VAD hangover and the
+      final transcription run; costs one extra STT request per pause and an
+      LLM request whenever the user keeps talking or the final text differs
+    - max_seconds: cap on one utterance; at the cap it is transcribed as if it
+      had ended and the VAD measures the noise floor again
+    """
+
+    def __init__(self, llm, session=None, backend_factory=default_backend,
+                 samplerate: int = 16000, frame_ms: int = 30, hangover_ms: int = 500,
+                 barge_in: bool = True, barge_in_ratio: float = 2.5, queue_size: int = 4,
+                 speculate: bool = True, pause_ms: int = 210, max_seconds: float = 30.0):
+        self.llm = llm
+        self.session = session
+        self.backend_factory = backend_factory
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.hangover_ms = hangover_ms
+        self.barge_in = barge_in
+        self.barge_in_ratio = barge_in_ratio
+        self.queue_size = queue_size
+        self.speculate = speculate
+        self.pause_ms = pause_ms
+        self.max_seconds = max_seconds
+
+        self.handoffs = {name: deque(maxlen=512) for name in ("capture->stt", "stt->llm", "llm->tts")}
+        self.barge_ins = 0
+        # wasted: LLM requests thrown away; interims_wasted: interim STT requests
+        # that never led to a used reply (no LLM start, or dropped before one)
+        self.speculation = {"interims": 0, "started": 0, "hits": 0, "wasted": 0, "interims_wasted": 0}
+        self._specs = {}  # turn id -> Speculation
+        self._reply = None
+        self._dialog = None
+        self._error = None  # what killed the capture thread, re-raised by run()
+        self._speaking = False
+        self._stop = threading.Event()
+
+    # ---------- Public ----------
+
+    async def run(self):
+        """Until the user says bye or stop() is called; re-raises a stage or capture failure."""
+        self.loop = asyncio.get_running_loop()
+        self.utterances = StageQueue(self.queue_size, self.handoffs["capture->stt"])
+        self.transcripts = StageQueue(self.queue_size, self.handoffs["stt->llm"])
+        self._stop.clear()
+        self._error = None
+
+        capture = threading.Thread(target=self._capture_loop, daemon=True)
+        capture.start()
+        stt = asyncio.create_task(self._transcribe_stage())
+        self._dialog = asyncio.create_task(self._dialog_stage())
+        try:
+            # wait() rather than await: stop() cancelling the dialog is a normal exit.
+            # The STT stage only ends by crashing, which would otherwise leave the
+            # dialog waiting on transcripts forever (FIRST_EXCEPTION ignores a
+            # cancelled dialog, so FIRST_COMPLETED covers both)
+            done, _ = await asyncio.wait({stt, self._dialog}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled():
+                    task.result()
+        finally:
+            self._stop.set()
+            self._dialog.cancel()
+            stt.cancel()
+            self._cancel_reply()
+            for spec in list(self._specs.values()):
+                self._drop_speculation(spec.turn)
+            tasks = [stt, self._dialog] + ([self._reply] if self._reply is not None else [])
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for backend, turn in self.utterances.drain():
+                self._discard_utterance(backend, turn)
+            for _, turn in self.transcripts.drain():
+                tracing.tracer.end(turn, cancelled=True)
+            await asyncio.to_thread(capture.join, 1.0)
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        """Make run() return; safe to call from any thread."""
+        self._stop.set()
+        if self._dialog is not None and not self._dialog.done():
+            self.loop.call_soon_threadsafe(self._dialog.cancel)
+
+    def handoff_stats(self) -> dict:
+        """p50 / p95 / max handoff latency in ms per stage boundary."""
+        out = {}
+        for name, waits in self.handoffs.items():
+            if waits:
+                out[name] = {
+                    "n": len(waits),
+                    "p50_ms": 1000 * tracing.percentile(waits, 0.50),
+                    "p95_ms": 1000 * tracing.percentile(waits, 0.95),
+                    "max_ms": 1000 * max(waits),
+                }
+        return out
+
+    def speculation_stats(self) -> dict:
+        """
+        Counters plus hit / waste rate per speculative LLM request, and the
+        share of interim STT requests that were wasted (with or without an LLM start).
+        """
+        stats = dict(self.speculation)
+        started, interims = stats["started"], stats["interims"]
+        stats["hit_rate"] = stats["hits"] / started if started else None
+        stats["waste_rate"] = stats["wasted"] / started if started else None
+        stats["interim_waste_rate"] = (stats["wasted"] + stats["interims_wasted"]) / interims if interims else None
+        return stats
+
+    # ---------- Stage 1: capture (thread) ----------
+
+    def _capture_loop(self):
+        import sounddevice as sd  # PortAudio is loaded only once capture starts
+        vad = VoiceActivityDetector(self.samplerate, frame_ms=self.frame_ms, hangover_ms=self.hangover_ms)
+        base_ratio = vad.threshold_ratio
+        preroll = deque(maxlen=max(1, 300 // self.frame_ms))
+        backend = None
+        # the utterance so far, for interim transcripts; preallocated for the longest one
+        audio = np.zeros((preroll.maxlen + int(self.max_seconds * 1000 / self.frame_ms)) * vad.frame_len,
+                         dtype=np.int16)
+        length = 0
+        paused = False
+        meter = levels().mic
+
+        try:
+            with sd.InputStream(samplerate=self.samplerate, channels=1, dtype="int16",
+                                blocksize=vad.frame_len) as stream:
+                while not self._stop.is_set():
+                    frame, _ = stream.read(vad.frame_len)
+                    meter.publish(frame, self.samplerate)
+                    vad.threshold_ratio = base_ratio * (self.barge_in_ratio if self._speaking else 1.0)
+                    event = vad.process(frame)
+
+                    if backend is None:
+                        preroll.append(frame)
+                        if event == "start":
+                            turn = tracing.Turn()
+                            turn.mark("speech_start")
+                            self.loop.call_soon_threadsafe(self._on_speech_start)
+                            backend = self.backend_factory()
+                            backend.start(self.samplerate)
+                            length = 0
+                            for f in preroll:
+                                backend.push(f)
+                                audio[length:length + len(f)] = f[:, 0]
+                                length += len(f)
+                            paused = False
+                            preroll.clear()
+                        continue
+
+                    backend.push(frame)
+                    audio[length:length + len(frame)] = frame[:, 0]
+                    length += len(frame)
+                    if length + vad.frame_len > len(audio):  # at the cap: transcribe what we have
+                        print(f"⚠️ Utterance reached {self.max_seconds:.0f}s, cutting it off")
+                        vad.recalibrate()
+                        event = "end"
+                    if self.speculate and event != "end":
+                        quiet = vad.silence_ms
+                        if paused and quiet == 0:  # kept talking: the interim is stale
+                            paused = False
+                            self.loop.call_soon_threadsafe(self._drop_speculation, turn)
+                        elif not paused and quiet >= self.pause_ms:
+                            paused = True
+                            self.loop.call_soon_threadsafe(self._on_pause, audio[:length].copy(), turn)
+                    if event == "end":
+                        turn.mark("vad_end")
+                        self.loop.call_soon_threadsafe(self._queue_utterance, backend, turn)
+                        backend = None
+        except Exception as e:  # PortAudio errors, a backend failing in start(), ...
+            print("❌ Audio capture failed:", e)
+            self.loop.call_soon_threadsafe(self._capture_failed, e)
+        finally:
+            if backend is not None:  # stopped mid-utterance; run() drops its speculation
+                backend.close()
+                tracing.tracer.end(turn, cancelled=True)
+
+    def _capture_failed(self, error: Exception):
+        self._error = error
+        self.stop()
+
+    def _queue_utterance(self, backend, turn):
+        dropped = self.utterances.put_nowait((backend, turn))
+        if dropped is not None:  # STT fell behind by a whole queue
+            self._discard_utterance(*dropped)
+
+    def _discard_utterance(self, backend, turn):
+        backend.close()
+        self._drop_speculation(turn)
+        tracing.tracer.end(turn, cancelled=True)
+
+    def _on_speech_start(self):
+        if self.barge_in and self._reply is not None and not self._reply.done():
+            self.barge_ins += 1
+            self._cancel_reply()
+
+    # ---------- Stage 2: transcription ----------
+
+    async def _transcribe_stage(self):
+        while True:
+            backend, turn = await self.utterances.get()
+            tracing.activate(turn)  # to_thread copies the context, so STT marks land on turn
+            try:
+                text = await asyncio.to_thread(backend.finish)
+            except Exception as e:  # network error, rate-limit timeout, ...: lose this utterance only
+                print("❌ STT Error:", e)
+                text = None
+            if text and text.strip():
+                await self.transcripts.put((text.strip(), turn))
+            else:
+                self._drop_speculation(turn)
+                tracing.tracer.end(turn, cancelled=True)
+
+    # ---------- Speculation ----------
+
+    def _on_pause(self, audio, turn):
+        self._drop_speculation(turn)
+        spec = self._specs[turn.id] = Speculation(turn)
+        spec.task = asyncio.ensure_future(self._speculate(spec, audio))
+
+    async def _speculate(self, spec, audio):
+        tracing.activate(None)  # the interim request is not the turn's STT
+        backend = self.backend_factory()
+
+        def interim():
+            backend.start(self.samplerate)
+            step = self.samplerate * self.frame_ms // 1000
+            for i in range(0, len(audio), step):  # frame by frame, as the capture pushes it
+                backend.push(audio[i:i + step])
+            return backend.finish()
+
+        self.speculation["interims"] += 1
+        spec.interim = True
+        try:
+            text = await asyncio.to_thread(interim)
+        except Exception as e:  # the final transcript still goes through _transcribe_stage
+            print("⚠️ Interim STT failed:", e)
+            return
+        if spec.cancelled.is_set() or not text or not text.strip():
+            return
+        if text.lower().strip(" .!?") in EXIT_WORDS:
+            return
+        spec.text = text.strip()
+        self.speculation["started"] += 1
+        tracing.activate(spec.trace)
+        spec.thinker = asyncio.ensure_future(
+            asyncio.to_thread(self._think, spec.text, spec.tokens, spec.cancelled, False))
+
+    def _drop_speculation(self, turn):
+        spec = self._specs.pop(turn.id, None)
+        if spec is None:
+            return
+        spec.cancelled.set()
+        spec.task.cancel()
+        if spec.thinker is not None:
+            self.speculation["wasted"] += 1
+        elif spec.interim:
+            self.speculation["interims_wasted"] += 1
+
+    # ---------- Stages 3 + 4: think and speak ----------
+
+    async def _dialog_stage(self):
+        while not self._stop.is_set():
+            text, turn = await self.transcripts.get()
+            print("You:", text)
+
+            spec = self._specs.get(turn.id)
+            if spec is not None and spec.matches(text):
+                del self._specs[turn.id]
+                self.speculation["hits"] += 1
+            else:
+                self._drop_speculation(turn)
+                spec = None
+
+            if self._reply is not None and not self._reply.done():
+                if self.barge_in:
+                    self._cancel_reply()
+                # let the old reply finish its memory writes (an adopted
+                # speculation commits its turn on the way out) before this
+                # turn's question goes in; the old LLM thread holds the
+                # session lock until then anyway
+                await asyncio.gather(self._reply, return_exceptions=True)
+
+            if text.lower().strip(" .!?") in EXIT_WORDS:
+                print("Jessica: Bye.")
+                tracing.tracer.end(turn)
+                await asyncio.to_thread(speak_text, "Bye Sir")
+                return
+
+            self._reply = asyncio.create_task(self._respond(text, turn, spec))
+
+    def _cancel_reply(self):
+        if self._reply is not None and not self._reply.done():
+            self._reply.cancel()
+
+    def _think(self, text: str, tokens, cancelled: threading.Event, commit: bool = True):
+        """LLM thread: stream the reply into tokens (then _END) until cancelled."""
+        loop = self.loop
+        gen = stream_jessica(self.llm, text, session=self.session, commit=commit)
+        parts = []
+        try:
+            for token in gen:
+                parts.append(token)
+                # bounded queue: block the LLM thread while the speaker lags
+                fut = asyncio.run_coroutine_threadsafe(tokens.put(token), loop)
+                while not cancelled.is_set():
+                    try:
+                        fut.result(timeout=0.1)
+                        break
+                    except TimeoutError:
+                        pass
+                if cancelled.is_set():
+                    fut.cancel()
+                    return None
+        except Exception as e:
+            print("Error:", e)
+            parts = None
+        finally:
+            gen.close()  # a cancelled reply is never written to memory
+            if not cancelled.is_set():
+                asyncio.run_coroutine_threadsafe(tokens.put(_END), loop)
+        return "".join(parts) if parts is not None else None
+
+    async def _respond(self, text: str, turn=None, spec=None):
+        """Speak the reply to text: a fresh LLM stream, or the adopted speculation spec."""
+        tracing.activate(turn)  # this task's own context: the think thread and pipeline inherit it
+        pipeline = SpeechPipeline()
+        if spec is None:
+            tokens = StageQueue(64, self.handoffs["llm->tts"])
+            cancelled = threading.Event()
+            thinker = asyncio.ensure_future(asyncio.to_thread(self._think, text, tokens, cancelled))
+        else:
+            tokens, cancelled, thinker = spec.tokens, spec.cancelled, spec.thinker
+            turn.meta["speculative"] = True
+
+        self._speaking = True
+        finished = False
+        try:
+            print("Jessica:", end=" ", flush=True)
+            while True:
+                token = await tokens.get()
+                if token is _END:
+                    break
+                print(token, end="", flush=True)
+                pipeline.feed(token)
+            print()
+            finished = True
+            await asyncio.to_thread(pipeline.close)
+        except asyncio.CancelledError:
+            print(" [interrupted]")
+            cancelled.set()
+            pipeline.cancel()
+            raise
+        finally:
+            self._speaking = False
+            results = await asyncio.gather(thinker, return_exceptions=True)
+            if spec is not None:
+                # the preview left memory alone: record the turn now
+                reply = results[0] if finished and isinstance(results[0], str) else None
+                await asyncio.to_thread(commit_reply, text, reply, self.session)
+                for name, t in spec.trace.marks.items():
+                    turn.marks.setdefault(name, t)
+            tracing.tracer.end(turn, cancelled=cancelled.is_set())
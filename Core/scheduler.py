@@ -0,0 +1,319 @@
+# scheduler.py
+# Admission control for the rate-limited APIs (Groq, ElevenLabs), shared by
+# every thread in the process:
+#
+# - per-provider token buckets for requests/min and tokens/min, seeded from
+#   JESSICA_<PROVIDER>_RPM / _TPM and re-synced from the x-ratelimit-* headers
+#   of every response (configured budgets stay a ceiling: Groq's request
+#   headers describe the daily quota); a 429 pauses the whole provider for its
+#   Retry-After instead of letting each caller retry into the same wall
+# - callers wait in priority order, so interactive turns go ahead of batch jobs;
+#   an interactive caller that would wait longer than JESSICA_MAX_WAIT seconds
+#   gets RateLimitTimeout instead of hanging on an exhausted quota
+# - identical in-flight calls (same prompt, same TTS text) are coalesced
+# - queue depth, wait times, throttles and coalesced calls for /health and benchmarks
+#
+# transport.request() and the httpx client behind ChatGroq call acquire() /
+# observe() for endpoints that name a provider, so callers only pick a priority:
+#
+#   with scheduler.priority(BATCH):
+#       synthesize(text)
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import deque
+
+from Core.env import getenv
+from Core.tracing import percentile
+
+INTERACTIVE = 0
+BATCH = 10
+
+_priority = contextvars.ContextVar("jessica_priority", default=INTERACTIVE)
+
+
+class RateLimitTimeout(RuntimeError):
+    """A provider had no budget for a request within its caller's max_wait."""
+
+
+class TokenBucket:
+    """
+    `capacity` units, refilled at `rate` units/s; unlimited while capacity is None.
+    A configured capacity and rate are ceilings that sync() never raises.
+    Not thread-safe on its own (the Provider lock guards it).
+    """
+
+    def __init__(self, capacity: float = None, rate: float = None):
+        self.capacity = capacity
+        self.rate = rate if rate is not None else (capacity / 60.0 if capacity else None)
+        self.level = capacity
+        self.max_capacity = self.capacity
+        self.max_rate = self.rate
+        self._t = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        """Seconds until n units are available (0 if they are now)."""
+        self._refill(now)
+        if self.capacity is None or n <= self.level:
+            return 0.0
+        # a request larger than the whole bucket goes through once it is full
+        return (min(n, self.capacity) - self.level) / self.rate
+
+    def take(self, n: float):
+        if self.capacity is not None:
+            self.level -= n  # may go negative for an oversized request; it is paid back by refill
+
+    def sync(self, limit: float, remaining: float, reset: float, now: float):
+        """
+        Adopt the server's view: `remaining` of `limit` now, full again in `reset` s.
+        With configured limits the server can only tighten the bucket, and its
+        refill rate (a daily one for Groq requests) is only taken once it reports
+        the quota exhausted.
+        """
+        self._refill(now)
+        if reset and remaining < limit:
+            rate = (limit - remaining) / reset
+        else:
+            rate = self.rate or limit / 60.0
+        if self.max_capacity is None:
+            self.capacity = limit
+            self.level = remaining
+            self.rate = rate
+            return
+        self.capacity = min(limit, self.max_capacity)
+        self.level = min(self.level, remaining, self.capacity)
+        self.rate = min(rate, self.max_rate) if remaining < 1 else self.max_rate
+
+
+class Provider:
+    """Budgets, waiters and counters of one API provider."""
+
+    def __init__(self, name: str, rpm: float = None, tpm: float = None, window: int = 512):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.cond = threading.Condition()
+        self.waiters = []  # heap of (priority, seq)
+        self.waits = deque(maxlen=window)
+        self.stats = {"admitted": 0, "delayed": 0, "throttles": 0, "timeouts": 0, "max_depth": 0}
+
+    def wait_time(self, cost: float, now: float) -> float:
+        return max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(cost, now))
+
+
+def _duration(value: str) -> float:
+    """Groq reset values like "7.66s", "2m59.56s", "120ms", "1h2m" -> seconds."""
+    total = 0.0
+    for number, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value or ""):
+        total += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class Scheduler:
+    def __init__(self):
+        self._providers = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._inflight = {}
+        self.coalesced = 0
+        self.max_wait = float(getenv("JESSICA_MAX_WAIT", "30"))
+
+    def provider(self, name: str) -> Provider:
+        with self._lock:
+            p = self._providers.get(name)
+            if p is None:
+                rpm = getenv(f"JESSICA_{name.upper()}_RPM")
+                tpm = getenv(f"JESSICA_{name.upper()}_TPM")
+                p = self._providers[name] = Provider(name, float(rpm) if rpm else None,
+                                                     float(tpm) if tpm else None)
+            return p
+
+    def configure(self, name: str, rpm: float = None, tpm: float = None, burst: float = None):
+        """
+        Set a provider's budgets by hand; response headers can only lower them.
+        - burst: requests that may start back to back (default: a minute's worth)
+        """
+        p = self.provider(name)
+        with p.cond:
+            if rpm:
+                p.requests = TokenBucket(burst or rpm, rpm / 60.0)
+            if tpm:
+                p.tokens = TokenBucket(tpm)
+
+    # ---------- Priority ----------
+
+    @staticmethod
+    @contextlib.contextmanager
+    def priority(level: int):
+        """Requests made in this block (on this thread / task) queue at `level`; lower goes first."""
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    # ---------- Admission ----------
+
+    def acquire(self, name: str, cost: float = 0, priority: int = None, max_wait: float = None):
+        """
+        Block until provider `name` has budget for one request of `cost` tokens
+        and every waiter with a better (lower) priority has gone. Returns seconds waited.
+        - cost: LLM tokens, TTS characters; counted against the TPM bucket
+        - max_wait: raise RateLimitTimeout once waiting would take longer than this;
+          defaults to JESSICA_MAX_WAIT for interactive requests, no limit for batch
+        """
+        p = self.provider(name)
+        entry = (_priority.get() if priority is None else priority, next(self._seq))
+        if max_wait is None and entry[0] <= INTERACTIVE:
+            max_wait = self.max_wait
+        t0 = time.monotonic()
+        deadline = t0 + max_wait if max_wait else None
+        with p.cond:
+            if not p.waiters and not p.wait_time(cost, t0):
+                return self._admit(p, cost, 0.0)
+            heapq.heappush(p.waiters, entry)
+            p.stats["delayed"] += 1
+            p.stats["max_depth"] = max(p.stats["max_depth"], len(p.waiters))
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None  # until the head changes
+                    if p.waiters[0] == entry:
+                        wait = p.wait_time(cost, now)
+                        if not wait:
+                            break
+                    if deadline is not None:
+                        if now + (wait or 0.0) > deadline:
+                            # the budget won't come back in time; fail now rather than at the deadline
+                            p.stats["timeouts"] += 1
+                            raise RateLimitTimeout(
+                                f"{name}: no rate-limit budget within {max_wait:.0f}s "
+                                f"(next in {p.wait_time(cost, now):.0f}s)")
+                        wait = deadline - now if wait is None else wait
+                    p.cond.wait(wait)
+            finally:
+                p.waiters.remove(entry)
+                heapq.heapify(p.waiters)
+                p.cond.notify_all()
+            return self._admit(p, cost, time.monotonic() - t0)
+
+    @staticmethod
+    def _admit(p: Provider, cost: float, waited: float) -> float:
+        p.requests.take(1)
+        p.tokens.take(cost)
+        p.stats["admitted"] += 1
+        p.waits.append(waited)
+        return waited
+
+    def observe(self, name: str, status: int, headers):
+        """Feed a response's rate-limit headers back into provider `name`'s buckets."""
+        p = self.provider(name)
+        now = time.monotonic()
+        with p.cond:
+            for kind, bucket in (("requests", p.requests), ("tokens", p.tokens)):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if limit and remaining:
+                    try:
+                        bucket.sync(float(limit), float(remaining),
+                                    _duration(headers.get(f"x-ratelimit-reset-{kind}")), now)
+                    except ValueError:
+                        pass
+            if status == 429:
+                try:
+                    pause = float(headers.get("retry-after") or 1.0)
+                except ValueError:
+                    pause = 1.0
+                self._pause(p, min(pause, 30.0), now)
+            p.cond.notify_all()
+
+    def throttle(self, name: str, seconds: float):
+        """Hold every request to provider `name` for `seconds`."""
+        p = self.provider(name)
+        with p.cond:
+            self._pause(p, seconds, time.monotonic())
+            p.cond.notify_all()
+
+    @staticmethod
+    def _pause(p: Provider, seconds: float, now: float):
+        if now + seconds > p.paused_until:
+            p.paused_until = now + seconds
+            p.stats["throttles"] += 1
+            print(f"⚠️ {p.name} rate limit hit, holding requests for {seconds:.1f}s")
+
+    # ---------- Coalescing ----------
+
+    def coalesce(self, key, fn):
+        """
+        Run fn() unless an identical call (same hashable key) is already in
+        flight; then wait for that one and share its result (or its exception).
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    # ---------- Metrics ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            providers = list(self._providers.values())
+            out = {"coalesced": self.coalesced, "in_flight_shared": len(self._inflight)}
+        now = time.monotonic()
+        for p in providers:
+            with p.cond:
+                waits = p.waits
+                out[p.name] = {
+                    **p.stats,
+                    "queue_depth": len(p.waiters),
+                    "paused_s": round(max(0.0, p.paused_until - now), 2),
+                    "wait_ms_p50": round(1000 * percentile(waits, 0.50), 1) if waits else None,
+                    "wait_ms_p95": round(1000 * percentile(waits, 0.95), 1) if waits else None,
+                    "requests_left": None if p.requests.capacity is None else round(p.requests.level),
+                    "tokens_left": None if p.tokens.capacity is None else round(p.tokens.level),
+                }
+        return out
+
+
+scheduler = Scheduler()
@@ -0,0 +1,455 @@
+# server.py
+# Local HTTP front-end for kiosks and web clients, on plain asyncio streams:
+#
+#   POST /chat        {"message": ..., "session": optional id}
+#                     -> text/event-stream: "token" events, then "done" (or "error")
+#                     add ?stream=0 for one JSON reply from ask_jessica
+#   POST /transcribe  body = an audio file (wav / flac / ogg / mp3) -> {"text": ...}
+#   POST /speak       {"text": ...} -> chunked raw PCM (s16le, 22050 Hz mono) as it is synthesized;
+#                     a failure mid-stream ends the body early with an X-Error trailer
+#   GET  /health      counters, in-flight requests, latency percentiles and provider queues
+#
+# The LLM and speech clients run in a bounded worker pool. Each response is
+# fed through a small queue that is only refilled once the client has taken
+# the previous write (drain()), so a slow reader pauses its own generation
+# instead of buffering it. A client (X-Client-Id header, else its address)
+# may have `per_client` requests running; beyond `max_concurrency` requests
+# wait up to `queue_timeout` s for a slot, then get 503.
+#
+#   python -m Core.server [--port 8080] [--max-concurrency 8] [--per-client 2]
+
+import argparse
+import asyncio
+import contextlib
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+MAX_BODY = 25 << 20  # uploads larger than this get 413
+STREAM_QUEUE = 16    # tokens / audio chunks buffered per response
+_END = object()
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "client", "started", "workers")
+
+    def __init__(self, method, path, query, headers, body, client):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.client = client
+        self.started = False  # the status line is out; errors must be reported in-band
+        self.workers = []     # pool futures; the worker slot is held until they finish
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return data
+
+
+class ServerStats:
+    """Request counters and a window of recent latencies per endpoint."""
+
+    def __init__(self, window: int = 1024):
+        self.started = time.time()
+        self.requests = {}
+        self.rejected = {}
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = {}
+        self.ttfb = {}
+        self._window = window
+
+    def record(self, endpoint: str, seconds: float, ttfb: float = None):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        self.latency.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+        if ttfb is not None:
+            self.ttfb.setdefault(endpoint, deque(maxlen=self._window)).append(ttfb)
+
+    def reject(self, status: int):
+        self.rejected[status] = self.rejected.get(status, 0) + 1
+
+    def snapshot(self) -> dict:
+        from Core.tracing import percentile
+
+        def pct(values):
+            return {f"p{int(q * 100)}_ms": round(1000 * percentile(values, q), 1)
+                    for q in (0.5, 0.95, 0.99)} if values else None
+
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": dict(self.requests),
+            "rejected": dict(self.rejected),
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "latency": {k: pct(v) for k, v in self.latency.items()},
+            "first_byte": {k: pct(v) for k, v in self.ttfb.items()},
+        }
+
+
+class JessicaServer:
+    """
+    - llm: a chat model (build_llm() if None, built on start)
+    - max_concurrency: requests doing LLM / speech work at once (also the worker pool size)
+    - per_client: concurrent requests allowed per client
+    - queue_timeout: how long a request may wait for a free slot before 503
+    """
+
+    def __init__(self, llm=None, host: str = "127.0.0.1", port: int = 8080, max_concurrency: int = 8,
+                 per_client: int = 2, queue_timeout: float = 10.0):
+        self.llm = llm
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+        self.stats = ServerStats()
+        self._clients = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="jessica-worker")
+        self._routes = {
+            ("POST", "/chat"): self.chat,
+            ("POST", "/transcribe"): self.transcribe,
+            ("POST", "/speak"): self.speak,
+            ("GET", "/health"): self.health,
+        }
+
+    async def start(self):
+        if self.llm is None:
+            from Chatbot.build_llm import build_llm
+            self.llm = await asyncio.get_running_loop().run_in_executor(self._pool, build_llm)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=1 << 16)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        server = await self.start()
+        print(f"Jessica is serving on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    # ---------- Connection ----------
+
+    async def _handle(self, reader, writer):
+        endpoint = request = None
+        try:
+            request = await self._read_request(reader, writer)
+            handler = self._routes.get((request.method, request.path))
+            if handler is None:
+                allowed = any(path == request.path for _, path in self._routes)
+                raise HTTPError(405 if allowed else 404, f"{request.method} {request.path}")
+            endpoint = request.path.lstrip("/")
+            if handler == self.health:
+                await handler(request, writer)
+            else:
+                async with self._admit(request):
+                    t0 = time.perf_counter()
+                    ttfb = await handler(request, writer)
+                    self.stats.record(endpoint, time.perf_counter() - t0, ttfb)
+        except HTTPError as e:
+            self.stats.reject(e.status)
+            headers = {"Retry-After": f"{e.retry_after:.0f}"} if e.retry_after else {}
+            await self._send_json(writer, e.status, {"error": str(e)}, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # the client went away
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"❌ Server Error ({endpoint}):", e)
+            if request is None or not request.started:
+                try:
+                    await self._send_json(writer, 500, {"error": str(e)})
+                except ConnectionError:
+                    pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, writer) -> Request:
+        line = await reader.readline()
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if length < 0:
+            raise HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"body over {MAX_BODY >> 20} MB")
+        body = await reader.readexactly(length) if length else b""
+        url = urlparse(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        peer = writer.get_extra_info("peername")
+        client = headers.get("x-client-id") or (peer[0] if peer else "?")
+        return Request(method.upper(), url.path, query, headers, body, client)
+
+    @contextlib.asynccontextmanager
+    async def _admit(self, request: Request):
+        """A per-client slot (429 if none) and then a worker slot (503 after queue_timeout)."""
+        running = self._clients.get(request.client, 0)
+        if running >= self.per_client:
+            raise HTTPError(429, f"at most {self.per_client} requests per client", retry_after=1)
+        self._clients[request.client] = running + 1
+        try:
+            self.stats.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise HTTPError(503, "server busy", retry_after=self.queue_timeout)
+            finally:
+                self.stats.waiting -= 1
+            self.stats.in_flight += 1
+            try:
+                yield
+            finally:
+                # a cancelled stream's worker may still be waiting on its next
+                # token or chunk; the slot is only free once the thread is
+                if request.workers:
+                    await asyncio.gather(*request.workers, return_exceptions=True)
+                self.stats.in_flight -= 1
+                self._slots.release()
+        finally:
+            self._release(request.client)
+
+    def _release(self, client: str):
+        left = self._clients.get(client, 1) - 1
+        if left:
+            self._clients[client] = left
+        else:
+            self._clients.pop(client, None)
+
+    # ---------- Responses ----------
+
+    @staticmethod
+    def _head(status: int, headers: dict) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Connection: close"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer, status: int, obj, headers: dict = None):
+        body = json.dumps(obj).encode()
+        writer.write(self._head(status, {"Content-Type": "application/json",
+                                         "Content-Length": len(body), **(headers or {})}) + body)
+        await writer.drain()
+
+    def _start(self, request: Request, writer, headers: dict):
+        """Send the 200 head of a streamed response."""
+        writer.write(self._head(200, headers))
+        request.started = True
+
+    def _stream_failed(self, request: Request, e: Exception):
+        self.stats.errors += 1
+        print(f"❌ Server Error ({request.path.lstrip('/')}):", e)
+
+    def _produce(self, request: Request, make_iter, cancelled: threading.Event):
+        """
+        Run the blocking iterator make_iter() on the worker pool and return a
+        bounded asyncio queue of its items, then _END (or the exception).
+        The worker blocks while the queue is full, i.e. while the client is slow.
+        """
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue(maxsize=STREAM_QUEUE)
+
+        def put(item) -> bool:
+            fut = asyncio.run_coroutine_threadsafe(items.put(item), loop)
+            while not cancelled.is_set():
+                try:
+                    fut.result(timeout=0.1)
+                    return True
+                except TimeoutError:
+                    pass
+            fut.cancel()
+            return False
+
+        def work():
+            it = make_iter()
+            try:
+                for item in it:
+                    if not put(item):
+                        return
+                put(_END)
+            except Exception as e:
+                put(e)
+            finally:
+                close = getattr(it, "close", None)
+                if close is not None:
+                    close()  # an abandoned chat reply is never written to memory
+
+        request.workers.append(loop.run_in_executor(self._pool, work))
+        return items
+
+    async def _stream(self, writer, items, cancelled: threading.Event, send):
+        """Forward items to the client with send(item); returns seconds to the first one."""
+        t0 = time.perf_counter()
+        ttfb = None
+        try:
+            while True:
+                item = await items.get()
+                if item is _END:
+                    return ttfb
+                if isinstance(item, Exception):
+                    raise item
+                if ttfb is None:
+                    ttfb = time.perf_counter() - t0
+                await send(item)
+        finally:
+            cancelled.set()  # stops the worker if we left early (disconnect, error)
+
+    # ---------- Endpoints ----------
+
+    async def chat(self, request: Request, writer):
+        from Chatbot.qa import ask_jessica, stream_jessica
+        data = request.json()
+        message = str(data.get("message") or "").strip()
+        if not message:
+            raise HTTPError(400, "message is required")
+        session = str(data.get("session") or request.headers.get("x-session-id") or uuid.uuid4().hex)
+
+        if request.query.get("stream") == "0":
+            loop = asyncio.get_running_loop()
+            reply = await loop.run_in_executor(self._pool, ask_jessica, self.llm, message, session)
+            await self._send_json(writer, 200, {"reply": reply, "session": session})
+            return None
+
+        cancelled = threading.Event()
+        items = self._produce(request, lambda: stream_jessica(self.llm, message, session=session), cancelled)
+        self._start(request, writer, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                      "X-Session-Id": session})
+        parts = []
+
+        async def send(token):
+            parts.append(token)
+            writer.write(_event("token", {"text": token}))
+            await writer.drain()
+
+        try:
+            ttfb = await self._stream(writer, items, cancelled, send)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            self._stream_failed(request, e)
+            writer.write(_event("error", {"error": str(e)}))
+            await writer.drain()
+            return None
+        writer.write(_event("done", {"reply": "".join(parts), "session": session}))
+        await writer.drain()
+        return ttfb
+
+    async def transcribe(self, request: Request, writer):
+        if not request.body:
+            raise HTTPError(400, "send the audio file as the request body")
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self._pool, _transcribe_bytes, request.body,
+                                          request.query.get("language", "en"))
+        if text is None:
+            raise HTTPError(503, "transcription failed", retry_after=1)
+        await self._send_json(writer, 200, {"text": text})
+        return None
+
+    async def speak(self, request: Request, writer):
+        from SpeechRecog.text_to_speech import SAMPLE_RATE, clean_text
+        from SpeechRecog.tts_backends import speech_stream
+        text = str(request.json().get("text") or "")
+        if not clean_text(text):
+            raise HTTPError(400, "text is required")
+
+        cancelled = threading.Event()
+        items = self._produce(request, lambda: speech_stream(text), cancelled)
+        self._start(request, writer, {"Content-Type": "application/octet-stream",
+                                      "X-Audio-Format": f"s16le; rate={SAMPLE_RATE}; channels=1",
+                                      "Transfer-Encoding": "chunked", "Trailer": "X-Error"})
+
+        async def send(chunk):
+            data = chunk.astype("<i2", copy=False).tobytes()
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+
+        try:
+            ttfb = await self._stream(writer, items, cancelled, send)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # end the body cleanly and say why in the trailer
+            self._stream_failed(request, e)
+            reason = str(e).replace("\r", " ").replace("\n", " ")
+            writer.write(f"0\r\nX-Error: {reason}\r\n\r\n".encode("latin-1", "replace"))
+            await writer.drain()
+            return None
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return ttfb
+
+    async def health(self, request: Request, writer):
+        from Core.scheduler import scheduler
+        await self._send_json(writer, 200, {"status": "ok", **self.stats.snapshot(),
+                                            "scheduler": scheduler.snapshot()})
+
+
+def _event(name: str, data: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def _transcribe_bytes(audio: bytes, language: str = "en"):
+    import io
+    import soundfile as sf
+    from SpeechRecog.stt_backends import default_backend
+    try:
+        samples, samplerate = sf.read(io.BytesIO(audio), dtype="int16", always_2d=True)
+    except Exception as e:
+        raise HTTPError(400, f"unreadable audio: {e}")
+    backend = default_backend(language_code=language)
+    backend.start(samplerate)
+    backend.push(samples)
+    return backend.finish()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve Jessica over HTTP (SSE chat, transcription, speech)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--max-concurrency", type=int, default=8)
+    ap.add_argument("--per-client", type=int, default=2)
+    ap.add_argument("--queue-timeout", type=float, default=10.0)
+    args = ap.parse_args(argv)
+    server = JessicaServer(host=args.host, port=args.port, max_concurrency=args.max_concurrency,
+                           per_client=args.per_client, queue_timeout=args.queue_timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# tracing.py
+# Per-turn latency tracing: named marks on a monotonic clock (speech start,
+# VAD end, STT request, first/last LLM token, first TTS byte, playback), one
+# JSONL record per turn and a per-stage percentile report.
+#
+#   python -m Core.tracing [trace.jsonl]     # print the report
+
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+from Core.env import getenv
+
+# next to the TTS cache rather than in whatever directory the assistant runs from
+DEFAULT_TRACE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "jessica", "trace.jsonl")
+
+
+def trace_path() -> str:
+    """JESSICA_TRACE (a .env value counts), else DEFAULT_TRACE_PATH; "" = don't write a log."""
+    return getenv("JESSICA_TRACE", DEFAULT_TRACE_PATH)
+
+
+# stage -> (from mark, to mark)
+STAGES = {
+    "capture": ("speech_start", "vad_end"),            # utterance incl. the silence tail
+    "stt": ("stt_start", "stt_end"),                   # upload + transcription
+    "llm_ttft": ("llm_start", "llm_first_token"),
+    "llm_gen": ("llm_first_token", "llm_last_token"),
+    "llm_total": ("llm_start", "llm_last_token"),     # also for blocking (non-streamed) calls
+    "tts_ttfb": ("tts_request", "tts_first_byte"),
+    "playback": ("playback_start", "playback_end"),
+    "response": ("vad_end", "playback_start"),         # user stops talking -> Jessica audible
+    "turn": ("speech_start", "playback_end"),
+}
+
+_current = contextvars.ContextVar("jessica_turn", default=None)
+_ids = itertools.count(1)
+
+
+class Turn:
+    """
+    Marks of one user turn as perf_counter() times. mark() keeps the first
+    time a name is seen (e.g. the first TTS byte of the turn); pass last=True
+    for marks that should move forward (e.g. the last LLM token).
+    """
+
+    __slots__ = ("id", "wall", "marks", "meta", "cancelled")
+
+    def __init__(self, **meta):
+        self.id = next(_ids)
+        self.wall = time.time()
+        self.marks = {}
+        self.meta = meta
+        self.cancelled = False
+
+    def mark(self, name: str, last: bool = False):
+        if last or name not in self.marks:
+            self.marks[name] = time.perf_counter()
+
+    def record(self) -> dict:
+        """JSON-friendly view: marks in ms since the earliest mark."""
+        t0 = min(self.marks.values()) if self.marks else 0.0
+        return {
+            "turn": self.id,
+            "ts": self.wall,
+            "cancelled": self.cancelled,
+            "marks": {k: round((t - t0) * 1000, 2) for k, t in sorted(self.marks.items(), key=lambda kv: kv[1])},
+            **self.meta,
+        }
+
+
+class Tracer:
+    """
+    Appends one JSON line per finished turn to path and keeps the records of
+    the last `keep` turns in memory for summary().
+    - path: None = trace_path(), looked up at the first write
+    """
+
+    def __init__(self, path: str = None, keep: int = 1000):
+        self._path = path
+        self.keep = keep
+        self.records = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    def begin(self, **meta) -> Turn:
+        """Start a turn and make it current in this context (thread / asyncio task)."""
+        turn = Turn(**meta)
+        _current.set(turn)
+        return turn
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = trace_path()
+        return self._path
+
+    @path.setter
+    def path(self, value: str):
+        self._path = value
+
+    def end(self, turn: Turn = None, cancelled: bool = False):
+        turn = turn or _current.get()
+        if turn is None:
+            return
+        turn.cancelled = turn.cancelled or cancelled
+        rec = turn.record()
+        with self._lock:
+            self.records.append(rec)
+            del self.records[:-self.keep]
+            if self.path:
+                try:
+                    if self._file is None:
+                        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                        self._file = open(self.path, "a", buffering=1)
+                    self._file.write(json.dumps(rec) + "\n")
+                except OSError as e:
+                    print("❌ Trace write failed:", e)
+                    self.path = ""
+        if _current.get() is turn:
+            _current.set(None)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return summarize(self.records)
+
+
+tracer = Tracer()
+
+
+def current():
+    return _current.get()
+
+
+def activate(turn):
+    """Make turn current in this context, e.g. at the top of a worker thread."""
+    _current.set(turn)
+
+
+def mark(name: str, last: bool = False):
+    """Mark the current turn; a no-op outside a traced turn."""
+    turn = _current.get()
+    if turn is not None:
+        turn.mark(name, last)
+
+
+# ---------- Report ----------
+
+def percentile(values, q: float):
+    """Nearest-rank q-quantile (q in 0..1) of values; None if there are none."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+def summarize(records) -> dict:
+    """stage -> {n, p50_ms, p95_ms, p99_ms} over the turns that have both marks."""
+    out = {}
+    for stage, (a, b) in STAGES.items():
+        d = [r["marks"][b] - r["marks"][a] for r in records
+             if a in r["marks"] and b in r["marks"] and not r.get("cancelled")]
+        if d:
+            out[stage] = {"n": len(d), "p50_ms": percentile(d, 0.50), "p95_ms": percentile(d, 0.95),
+                          "p99_ms": percentile(d, 0.99)}
+    return out
+
+
+def load(path: str = None) -> list:
+    with open(path or trace_path()) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_report(summary: dict) -> str:
+    lines = [f"{'stage':<10} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for stage, s in summary.items():
+        lines.append(f"{stage:<10} {s['n']:>5} {s['p50_ms']:9.1f} {s['p95_ms']:9.1f} {s['p99_ms']:9.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    records = load(sys.argv[1] if len(sys.argv) > 1 else None)
+    cancelled = sum(1 for r in records if r.get("cancelled"))
+    print(f"{len(records)} turns ({cancelled} cancelled)")
+    print(format_report(summarize(records)))
@@ -0,0 +1,268 @@
+# transport.py
+# Shared HTTP layer for ElevenLabs (requests) and Groq (httpx):
+# keep-alive pools, retry with backoff, per-endpoint timeouts, provider
+# rate limits (Core/scheduler.py) and connection-reuse / handshake metrics.
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from Core.scheduler import scheduler
+from Core.tracing import percentile
+
+POOL_SIZE = 8
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Endpoint:
+    connect_timeout: float = 3.05
+    read_timeout: float = 30.0
+    retries: int = 2
+    backoff: float = 0.25  # first retry waits ~backoff s, doubling after that
+    provider: str = None   # rate-limited through Core.scheduler under this name
+
+
+ENDPOINTS = {
+    "default": Endpoint(),
+    "stt": Endpoint(read_timeout=30.0, provider="elevenlabs"),
+    "tts": Endpoint(read_timeout=15.0, provider="elevenlabs"),
+    "llm": Endpoint(read_timeout=60.0, provider="groq"),
+}
+
+
+def endpoint_config(name: str) -> Endpoint:
+    return ENDPOINTS.get(name, ENDPOINTS["default"])
+
+
+# ---------- Metrics ----------
+
+class TransportMetrics:
+    """Counts requests vs. newly opened connections, plus connect+TLS handshake times."""
+
+    def __init__(self, window: int = 256):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.retries = {}
+        self.connections = {}
+        self.handshakes = deque(maxlen=window)
+        self.latencies = {}
+        self._window = window
+
+    def record_connect(self, host: str, seconds: float):
+        with self._lock:
+            self.connections[host] = self.connections.get(host, 0) + 1
+            self.handshakes.append(seconds)
+
+    def record_request(self, endpoint: str, seconds: float):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.latencies.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+
+    def record_retry(self, endpoint: str):
+        with self._lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self.requests.values())
+            opened = sum(self.connections.values())
+            hs = self.handshakes
+            return {
+                "requests": dict(self.requests),
+                "retries": dict(self.retries),
+                "connections_opened": dict(self.connections),
+                "connection_reuse": (1 - opened / total) if total else None,
+                "handshake_ms_avg": 1000 * sum(hs) / len(hs) if hs else None,
+                "handshake_ms_p50": 1000 * percentile(hs, 0.5) if hs else None,
+                "request_ms_avg": {
+                    k: 1000 * sum(v) / len(v) for k, v in self.latencies.items() if v
+                },
+            }
+
+
+metrics = TransportMetrics()
+
+
+# ---------- requests / urllib3 ----------
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        metrics.record_connect(self.host, time.perf_counter() - t0)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        # TCP connect + TLS handshake
+        t0 = time.perf_counter()
+        super().connect()
+        metrics.record_connect(self.host, time.perf_counter() - t0)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session() -> requests.Session:
+    """The process-wide keep-alive session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = _PooledAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def _backoff_delay(cfg: Endpoint, attempt: int, retry_after=None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), 30.0)
+        except ValueError:
+            pass
+    return cfg.backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+def request(method: str, url: str, endpoint: str = "default", retries: int = None, cost: float = 0,
+            **kwargs):
+    """
+    session().request with the endpoint's timeouts, retrying connection errors
+    and 429/5xx with exponential backoff (honouring Retry-After).
+    Each attempt waits for the endpoint's provider budget (see Core.scheduler).
+    - retries: override the endpoint default; use 0 for non-replayable bodies (generators)
+    - cost: tokens / characters the request spends of the provider's per-minute budget
+    """
+    cfg = endpoint_config(endpoint)
+    kwargs.setdefault("timeout", (cfg.connect_timeout, cfg.read_timeout))
+    attempts = 1 + (cfg.retries if retries is None else retries)
+
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        if cfg.provider:
+            scheduler.acquire(cfg.provider, cost)
+        t0 = time.perf_counter()
+        try:
+            response = session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+            metrics.record_retry(endpoint)
+            time.sleep(_backoff_delay(cfg, attempt))
+            continue
+
+        metrics.record_request(endpoint, time.perf_counter() - t0)
+        if cfg.provider:
+            scheduler.observe(cfg.provider, response.status_code, response.headers)
+        if response.status_code in RETRY_STATUS and not last:
+            metrics.record_retry(endpoint)
+            response.close()
+            if response.status_code != 429 or not cfg.provider:
+                time.sleep(_backoff_delay(cfg, attempt, response.headers.get("Retry-After")))
+            # a 429 paused the provider; the next acquire() waits it out with everyone else
+            continue
+        return response
+
+
+def post(url: str, endpoint: str = "default", retries: int = None, cost: float = 0, **kwargs):
+    return request("POST", url, endpoint=endpoint, retries=retries, cost=cost, **kwargs)
+
+
+# ---------- httpx (Groq) ----------
+
+class _HttpxTrace:
+    """httpcore trace callback: times connect (+TLS) for connections the pool had to open."""
+
+    def __init__(self, scheme: str, host: str):
+        self.scheme = scheme
+        self.host = host
+        self.t0 = time.perf_counter()
+        self._connect_t0 = None
+
+    def __call__(self, event: str, info: dict):
+        if event == "connection.connect_tcp.started":
+            self._connect_t0 = time.perf_counter()
+        elif event in ("connection.start_tls.complete", "connection.connect_tcp.complete"):
+            if self._connect_t0 is None:
+                return
+            # for https wait for the TLS handshake before recording
+            if event == "connection.connect_tcp.complete" and self.scheme == "https":
+                return
+            metrics.record_connect(self.host, time.perf_counter() - self._connect_t0)
+            self._connect_t0 = None
+
+
+def _httpx_hooks(endpoint: str):
+    provider = endpoint_config(endpoint).provider
+
+    def on_request(request):
+        if provider:
+            # ~4 bytes of JSON per prompt token; the response headers correct the estimate
+            scheduler.acquire(provider, cost=len(request.content) // 4)
+        request.extensions["trace"] = _HttpxTrace(request.url.scheme, request.url.host)
+
+    def on_response(response):
+        trace = response.request.extensions.get("trace")
+        if isinstance(trace, _HttpxTrace):
+            metrics.record_request(endpoint, time.perf_counter() - trace.t0)
+        if provider:
+            scheduler.observe(provider, response.status_code, response.headers)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def httpx_client(endpoint: str = "llm"):
+    """
+    Pooled httpx.Client for SDKs built on httpx (the Groq client behind ChatGroq).
+    Uses HTTP/2 when the `h2` package is installed.
+    """
+    import httpx
+
+    cfg = endpoint_config(endpoint)
+    http2 = _http2_available()
+    transport = httpx.HTTPTransport(
+        http2=http2,
+        retries=cfg.retries,  # connect errors only; the SDK retries 429/5xx itself
+        limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE,
+                            keepalive_expiry=60.0),
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(cfg.read_timeout, connect=cfg.connect_timeout),
+        event_hooks=_httpx_hooks(endpoint),
+    )
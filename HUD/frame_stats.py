@@ -0,0 +1,141 @@
+# frame_stats.py
+# Measured frame timing for the HUD (tick / paint durations, frame intervals,
+# dropped frames) and a governor that trades visual quality for frame time.
+
+import json
+import os
+import time
+
+import numpy as np
+
+
+class FrameStats:
+    """
+    Rolling window of the last `window` frames in preallocated arrays.
+    - budget_ms: frame budget; an interval spanning k budgets counts k-1 dropped frames
+    """
+
+    def __init__(self, budget_ms: float = 1000 / 60, window: int = 240):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.tick_ms = np.zeros(window, dtype=np.float32)
+        self.paint_ms = np.zeros(window, dtype=np.float32)
+        self.interval_ms = np.zeros(window, dtype=np.float32)
+        self.frames = 0
+        self.dropped = 0
+        self._i = 0
+
+    def record(self, tick_ms: float, paint_ms: float, interval_ms: float):
+        i = self._i
+        self.tick_ms[i] = tick_ms
+        self.paint_ms[i] = paint_ms
+        self.interval_ms[i] = interval_ms
+        self._i = (i + 1) % self.window
+        self.frames += 1
+        late = int(interval_ms / self.budget_ms + 0.5) - 1
+        if late > 0:
+            self.dropped += late
+
+    def _filled(self, arr: np.ndarray) -> np.ndarray:
+        return arr[:min(self.frames, self.window)]
+
+    def percentiles(self) -> dict:
+        """p50 / p95 / p99 in ms for tick, paint, tick+paint and frame interval."""
+        n = min(self.frames, self.window)
+        if n == 0:
+            return {}
+        series = {
+            "tick": self.tick_ms[:n],
+            "paint": self.paint_ms[:n],
+            "work": self.tick_ms[:n] + self.paint_ms[:n],
+            "interval": self.interval_ms[:n],
+        }
+        out = {}
+        for name, arr in series.items():
+            p50, p95, p99 = np.percentile(arr, (50, 95, 99))
+            out[name] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return out
+
+    def fps(self) -> float:
+        iv = self._filled(self.interval_ms)
+        mean = float(iv.mean()) if iv.size else 0.0
+        return 1000.0 / mean if mean > 0 else 0.0
+
+    def export(self, path: str, extra: dict = None):
+        """Write a JSON snapshot: percentiles, fps, dropped frames and the raw window."""
+        n = min(self.frames, self.window)
+        # oldest first
+        order = np.roll(np.arange(n), -self._i) if self.frames >= self.window else np.arange(n)
+        data = {
+            "timestamp": time.time(),
+            "budget_ms": self.budget_ms,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "fps": self.fps(),
+            "percentiles": self.percentiles(),
+            "tick_ms": self.tick_ms[order].round(3).tolist(),
+            "paint_ms": self.paint_ms[order].round(3).tolist(),
+            "interval_ms": self.interval_ms[order].round(3).tolist(),
+        }
+        if extra:
+            data.update(extra)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+
+# (particle emission scale, glow radius scale, antialiasing) from best to cheapest
+QUALITY_LEVELS = [
+    (1.00, 1.00, True),
+    (0.60, 0.85, True),
+    (0.35, 0.70, False),
+    (0.15, 0.50, False),
+]
+
+
+class QualityGovernor:
+    """
+    Steps down a quality level when tick+paint runs over `high` of the budget
+    for `patience` consecutive frames, and back up after 4x as many frames
+    below `low` of the budget (the asymmetry keeps it from oscillating).
+    """
+
+    def __init__(self, budget_ms: float = 1000 / 60, high: float = 0.9, low: float = 0.5,
+                 patience: int = 20):
+        self.budget_ms = budget_ms
+        self.high = high
+        self.low = low
+        self.patience = patience
+        self.level = 0
+        self._over = 0
+        self._under = 0
+
+    @property
+    def emission(self) -> float:
+        return QUALITY_LEVELS[self.level][0]
+
+    @property
+    def glow(self) -> float:
+        return QUALITY_LEVELS[self.level][1]
+
+    @property
+    def antialias(self) -> bool:
+        return QUALITY_LEVELS[self.level][2]
+
+    def update(self, work_ms: float) -> int:
+        if work_ms > self.budget_ms * self.high:
+            self._over += 1
+            self._under = 0
+        elif work_ms < self.budget_ms * self.low:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.patience and self.level < len(QUALITY_LEVELS) - 1:
+            self.level += 1
+            self._over = 0
+        elif self._under >= self.patience * 4 and self.level > 0:
+            self.level -= 1
+            self._under = 0
+        return self.level
@@ -0,0 +1,73 @@
+# graph.py
+# Array-backed node/edge network for the HUD. Neighbours are found with a
+# KD-tree (O(n log n) instead of testing every pair) and node drift is one
+# vectorized update per frame.
+
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+BASE_NODES = 50      # the original hand-tuned layout
+BASE_LINK_RADIUS = 180.0
+
+
+class NodeGraph:
+    """
+    - count: number of nodes, laid out in hemispherical bands over the area
+    - area: (x, y, width, height) the bands are spread over
+    - link_radius: max edge length; by default it shrinks as the network gets
+      denser so the number of edges per node stays about the same
+    - link_prob: chance that two nodes within link_radius get connected
+    """
+
+    def __init__(self, count: int = BASE_NODES, area=(150, 260, 800, 280), link_radius: float = None,
+                 link_prob: float = 0.35, seed: int = 7):
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        if link_radius is None:
+            link_radius = BASE_LINK_RADIUS * math.sqrt(BASE_NODES / max(count, 1))
+        self.link_radius = link_radius
+
+        self.pos = self._layout(count, area)
+        self.phase = self.rng.random(count).astype(np.float32)
+        # smaller nodes when packed densely so glows don't merge into one blob
+        shrink = max(0.3, min(1.0, math.sqrt(BASE_NODES / max(count, 1))))
+        self.radius = (self.rng.uniform(3, 6, count) * shrink).astype(np.float32)
+        self.hue = self.rng.integers(180, 201, count).astype(np.int32)  # cyan-blue
+
+        self.edges = self._connect(link_radius, link_prob)
+        self.dash_offset = self.rng.uniform(0, 100, len(self.edges)).astype(np.float32)
+
+    def _layout(self, count: int, area) -> np.ndarray:
+        # Bands get wider toward the bottom like the original 6, 8, ... 14 rows
+        x0, y0, w, h = area
+        bands = max(1, round(math.sqrt(count / 2)))
+        weights = np.array([3 + b for b in range(bands)], dtype=np.float64)
+        per_band = np.floor(weights / weights.sum() * count).astype(int)
+        per_band[-1] += count - per_band.sum()
+
+        jitter_x = w / max(1, per_band.max() - 1) / 4
+        jitter_y = h / max(1, bands - 1) / 7 if bands > 1 else 10
+        pos = np.empty((count, 2), dtype=np.float32)
+        i = 0
+        for band, n in enumerate(per_band):
+            y = y0 + (band * h / (bands - 1) if bands > 1 else h / 2)
+            xs = x0 + np.arange(n) * (w / max(1, n - 1))
+            pos[i:i + n, 0] = xs + self.rng.uniform(-jitter_x, jitter_x, n)
+            pos[i:i + n, 1] = y + self.rng.uniform(-jitter_y, jitter_y, n)
+            i += n
+        return pos
+
+    def _connect(self, radius: float, prob: float) -> np.ndarray:
+        pairs = cKDTree(self.pos).query_pairs(radius, output_type="ndarray")
+        keep = self.rng.random(len(pairs)) < prob
+        return pairs[keep].astype(np.int32)
+
+    def update(self, step: float = 1.0):
+        """Slight drift and dash animation; step is elapsed time in 16 ms frames."""
+        self.phase += 0.02 * step
+        self.pos[:, 0] += np.sin(self.phase) * (0.15 * step)
+        self.pos[:, 1] += np.cos(self.phase * 0.6) * (0.10 * step)
+        self.dash_offset += 1.6 * step
+        np.mod(self.dash_offset, 100.0, out=self.dash_offset)
@@ -0,0 +1,128 @@
+# render_cache.py
+# Pre-rendered glow sprites, batched sprite blits and a cached background
+# layer, so paintEvent stops building gradients/pens for every item per frame.
+
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap, QRadialGradient
+
+
+class SpriteCache:
+    """
+    QPixmap sprites keyed by (kind, radius, hue bucket, alpha bucket).
+    - hue_step / alpha_step: bucket widths; coarser buckets mean fewer sprites
+    - max_sprites: LRU bound on cached pixmaps
+    """
+
+    def __init__(self, hue_step: int = 4, alpha_step: int = 16, max_sprites: int = 512):
+        self.hue_step = hue_step
+        self.alpha_step = alpha_step
+        self.max_sprites = max_sprites
+        self._sprites = OrderedDict()
+
+    def glow(self, radius: float, hue: float, alpha: int, lightness: int = 160) -> QPixmap:
+        """Radial glow fading from hsl(hue, 255, lightness, alpha) at the center to transparent."""
+        key = ("glow", round(radius), int(hue) // self.hue_step, alpha // self.alpha_step, lightness)
+        return self._get(key, self._render_glow)
+
+    def core(self, radius: float) -> QPixmap:
+        """Solid node core with its outline; blink is applied as blit opacity."""
+        key = ("core", round(radius * 2) / 2, 0, 0, 0)
+        return self._get(key, self._render_core)
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def _get(self, key, render):
+        pm = self._sprites.get(key)
+        if pm is None:
+            pm = render(key)
+            self._sprites[key] = pm
+            if len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        return pm
+
+    def _render_glow(self, key) -> QPixmap:
+        _, r, hue_b, alpha_b, lightness = key
+        r = max(1, r)
+        hue = hue_b * self.hue_step + self.hue_step // 2
+        alpha = min(255, alpha_b * self.alpha_step + self.alpha_step // 2)
+        pm = QPixmap(2 * r, 2 * r)
+        pm.fill(Qt.GlobalColor.transparent)
+        c = QColor.fromHsl(hue % 360, 255, lightness, alpha)
+        rg = QRadialGradient(QPointF(r, r), r)
+        rg.setColorAt(0.0, c)
+        rg.setColorAt(1.0, QColor(c.red(), c.green(), c.blue(), 0))
+        p = QPainter(pm)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        p.setPen(Qt.PenStyle.NoPen)
+        p.setBrush(rg)
+        p.drawEllipse(QPointF(r, r), r, r)
+        p.end()
+        return pm
+
+    def _render_core(self, key) -> QPixmap:
+        r = key[1]
+        size = int(2 * r + 4)
+        pm = QPixmap(size, size)
+        pm.fill(Qt.GlobalColor.transparent)
+        p = QPainter(pm)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        p.setBrush(QColor(200, 255, 255, 220))
+        p.setPen(QPen(QColor(170, 255, 255, 200), 1))
+        p.drawEllipse(QPointF(size / 2, size / 2), r, r)
+        p.end()
+        return pm
+
+
+class SpriteBatch:
+    """Collects sprite blits and draws them with one drawPixmapFragments call per pixmap."""
+
+    def __init__(self):
+        self._groups = {}
+
+    def add(self, pixmap: QPixmap, x: float, y: float, opacity: float = 1.0):
+        group = self._groups.get(pixmap.cacheKey())
+        if group is None:
+            group = self._groups[pixmap.cacheKey()] = (pixmap, QRectF(pixmap.rect()), [])
+        group[2].append(QPainter.PixmapFragment.create(QPointF(x, y), group[1], 1.0, 1.0, 0.0, opacity))
+
+    def flush(self, painter: QPainter):
+        for pixmap, _, fragments in self._groups.values():
+            painter.drawPixmapFragments(fragments, pixmap)
+        self._groups.clear()
+
+
+class BackgroundLayer:
+    """Scaled background image + vignette, re-rendered only when the widget size changes."""
+
+    def __init__(self, bg: QPixmap):
+        self.bg = bg
+        self._pixmap = None
+
+    def invalidate(self):
+        self._pixmap = None
+
+    def pixmap(self, width: int, height: int) -> QPixmap:
+        if self._pixmap is not None and self._pixmap.width() == width and self._pixmap.height() == height:
+            return self._pixmap
+
+        pm = QPixmap(max(1, width), max(1, height))
+        p = QPainter(pm)
+        rect = pm.rect()
+        if not self.bg.isNull():
+            p.drawPixmap(rect, self.bg)  # fit background
+        else:
+            p.fillRect(rect, QColor(8, 12, 22))
+
+        # Dim vignette
+        vg = QRadialGradient(QPointF(width / 2, height / 2), max(width, height) * 0.75)
+        vg.setColorAt(0.0, QColor(0, 0, 0, 0))
+        vg.setColorAt(1.0, QColor(0, 0, 0, 160))
+        p.fillRect(rect, vg)
+        p.end()
+        self._pixmap = pm
+        return pm
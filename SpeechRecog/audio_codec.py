@@ -0,0 +1,40 @@
+import io
+from math import gcd
+import numpy as np
+
+# scipy.signal (~1 s) and soundfile are imported on first use
+
+# codec -> (soundfile format, subtype, upload filename, mime type)
+CODECS = {
+    "wav": ("WAV", "PCM_16", "audio.wav", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio.flac", "audio/flac"),
+    "opus": ("OGG", "OPUS", "audio.ogg", "audio/ogg"),
+}
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int = 16000) -> np.ndarray:
+    """
+    Downmix to mono and resample int16 audio with a polyphase FIR filter
+    (44.1 kHz -> 16 kHz is up 160 / down 441). Returns int16.
+    """
+    x = np.asarray(audio)
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    if src_rate == dst_rate:
+        return x.astype(np.int16, copy=False)
+    from scipy.signal import resample_poly
+    g = gcd(src_rate, dst_rate)
+    y = resample_poly(x.astype(np.float32), dst_rate // g, src_rate // g)
+    return np.clip(y, -32768, 32767).astype(np.int16)
+
+
+def encode(audio: np.ndarray, samplerate: int, codec: str = "flac"):
+    """
+    Encode audio into an in-memory file; returns (bytes, filename, mime type).
+    - codec: "wav", "flac" (lossless, ~2x smaller) or "opus" (lossy, needs libsndfile >= 1.0.29)
+    """
+    import soundfile as sf
+    fmt, subtype, name, mime = CODECS[codec]
+    buf = io.BytesIO()
+    sf.write(buf, audio, samplerate, format=fmt, subtype=subtype)
+    return buf.getvalue(), name, mime
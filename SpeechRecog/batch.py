@@ -0,0 +1,289 @@
+"""
+Headless bulk transcription and synthesis on the same ElevenLabs clients the
+live loop uses (pooled transport, retries on 429/5xx, TTS cache), with no
+microphone or speakers involved.
+
+    python -m SpeechRecog.batch transcribe calls/ more.wav list.txt --out transcripts/ --jobs 4
+    python -m SpeechRecog.batch synthesize prompts.txt --out prompts/ --jobs 4 --rate 2
+
+transcribe takes audio files, directories (searched recursively) and
+manifests (one path per line); outputs mirror the paths below the deepest
+directory holding all inputs, and inputs that would share an output are
+rejected. synthesize takes text files with one prompt
+per line, optionally "name<TAB>text" to choose the output file name (names
+that would land outside --out are slugged like unnamed prompts).
+
+Every finished item is appended to <out>/checkpoint.jsonl; a re-run skips
+what already succeeded and retries what failed. The throughput report is
+printed and written to <out>/report.json.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+AUDIO_EXTS = {".wav", ".flac", ".ogg", ".mp3", ".aiff", ".aif"}
+CHECKPOINT = "checkpoint.jsonl"
+REPORT = "report.json"
+
+
+# ---------- Inputs ----------
+
+def _audio_files(inputs):
+    """
+    Expand files, directories and manifests into (key, path) jobs. Keys are
+    paths relative to the deepest directory holding every input, so one
+    directory keys its files relative to itself while "a/x.wav b/x.wav" (or
+    two directories with the same layout) stay apart.
+    Raises ValueError when two files would still share a key (i.e. an output).
+    """
+    try:
+        root = os.path.commonpath([os.path.abspath(i if os.path.isdir(i) else os.path.dirname(i) or ".")
+                                   for i in inputs])
+    except ValueError:  # inputs on different drives
+        root = None
+
+    def key_of(path):
+        try:
+            key = os.path.relpath(os.path.abspath(path), root) if root else ""
+        except ValueError:
+            key = ""
+        return key if _safe_name(key) else os.path.basename(path)  # keep outputs inside --out
+
+    seen = {}
+    for path in _expand(inputs):
+        key = key_of(path)
+        if key in seen:
+            if os.path.normcase(os.path.abspath(seen[key])) == os.path.normcase(os.path.abspath(path)):
+                continue  # the same file listed twice
+            raise ValueError(f"{seen[key]} and {path} would both be written as {key!r}")
+        seen[key] = path
+        yield key, path
+
+
+def _expand(inputs):
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in sorted(os.walk(item)):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTS:
+                        yield os.path.join(root, name)
+        elif os.path.splitext(item)[1].lower() in AUDIO_EXTS:
+            yield item
+        else:
+            base = os.path.dirname(item)
+            with open(item, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yield os.path.join(base, line)
+
+
+def _slug(text: str) -> str:
+    words = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:40].rstrip("-")
+    return f"{words or 'prompt'}-{hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _safe_name(name: str) -> bool:
+    """A relative output name that can't climb out of the output directory."""
+    parts = re.split(r"[\\/]", name)
+    return bool(name) and not os.path.isabs(name) and ".." not in parts and all(parts) \
+        and not os.path.splitdrive(name)[0]
+
+
+def _prompts(inputs):
+    """Text lines (or "name<TAB>text") into (key, text) jobs."""
+    for item in inputs:
+        with open(item, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name, sep, text = line.partition("\t")
+                if not sep:
+                    name, text = _slug(line), line
+                elif not _safe_name(name):
+                    name = _slug(name)  # keep outputs inside --out
+                yield name, text
+
+
+# ---------- Workers ----------
+
+def transcribe_file(path: str, out_dir: str, key: str, language: str = "en") -> dict:
+    """Transcribe one audio file into <out_dir>/<key>.txt."""
+    import soundfile as sf
+    from .stt_backends import ElevenLabsBackend
+    audio, samplerate = sf.read(path, dtype="int16", always_2d=True)
+    backend = ElevenLabsBackend(language_code=language)
+    backend.start(samplerate)
+    backend.push(audio)
+    text = backend.finish()
+    if text is None:
+        raise RuntimeError("transcription failed")
+
+    out = os.path.join(out_dir, os.path.splitext(key)[0] + ".txt")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    return {"output": out, "audio_s": len(audio) / samplerate, "chars": len(text)}
+
+
+def synthesize_prompt(text: str, out_dir: str, key: str) -> dict:
+    """Render one prompt to <out_dir>/<key>.wav in Jessica's voice."""
+    import wave
+    from .text_to_speech import synthesize
+    audio = synthesize(text)
+    if audio is None:
+        raise RuntimeError("synthesis failed")
+
+    out = os.path.join(out_dir, key + ".wav")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with wave.open(out, "wb") as w:
+        w.setnchannels(audio.channels)
+        w.setsampwidth(audio.sample_width)
+        w.setframerate(audio.frame_rate)
+        w.writeframes(audio.pcm)
+    frames = audio.size // (audio.channels * audio.sample_width)
+    return {"output": out, "audio_s": frames / audio.frame_rate, "chars": len(text)}
+
+
+# ---------- Runner ----------
+
+def load_checkpoint(path: str) -> dict:
+    """key -> last record; a later line for the same key wins."""
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                done[rec["key"]] = rec
+    return done
+
+
+def run(jobs, work, out_dir: str, concurrency: int = 4, rate: float = None, resume: bool = True) -> dict:
+    """
+    Run work(payload, out_dir, key) for every (key, payload) in jobs.
+    - concurrency: requests in flight at once; jobs are pulled lazily, so
+      manifests of any size stay cheap
+    - rate: max ElevenLabs request starts per second; requests queue behind
+      live turns in the same process either way (see Core.scheduler)
+    - resume: skip keys the checkpoint records as done
+    Returns the throughput report.
+    """
+    from Core.scheduler import BATCH, scheduler
+    from Core.tracing import percentile
+    from Core.transport import metrics
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, CHECKPOINT)
+    done = {k for k, r in load_checkpoint(checkpoint_path).items() if r.get("ok")} if resume else set()
+    if rate:
+        scheduler.configure("elevenlabs", rpm=60 * rate, burst=1)
+    throttles_before = scheduler.snapshot().get("elevenlabs", {}).get("throttles", 0)
+    lock = threading.Lock()
+    stats = {"ok": 0, "failed": 0, "skipped": 0, "audio_s": 0.0, "chars": 0}
+    latencies = []
+    retries_before = sum(metrics.snapshot()["retries"].values())
+
+    def one(key, payload):
+        t0 = time.perf_counter()
+        try:
+            with scheduler.priority(BATCH):
+                rec = {"key": key, "ok": True, **work(payload, out_dir, key)}
+        except Exception as e:
+            rec = {"key": key, "ok": False, "error": str(e)}
+        rec["seconds"] = round(time.perf_counter() - t0, 3)
+        with lock:
+            checkpoint.write(json.dumps(rec) + "\n")
+            checkpoint.flush()
+            if rec["ok"]:
+                stats["ok"] += 1
+                stats["audio_s"] += rec["audio_s"]
+                stats["chars"] += rec["chars"]
+                latencies.append(rec["seconds"])
+            else:
+                stats["failed"] += 1
+                print(f"❌ {key}: {rec['error']}")
+
+    t0 = time.perf_counter()
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        for key, payload in jobs:
+            if key in done:
+                stats["skipped"] += 1
+                continue
+            if len(pending) >= 2 * concurrency:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(pool.submit(one, key, payload))
+        wait(pending)
+    wall = time.perf_counter() - t0
+
+    report = {
+        **stats,
+        "wall_s": round(wall, 3),
+        "items_per_s": round(stats["ok"] / wall, 3) if wall else None,
+        "audio_s_per_s": round(stats["audio_s"] / wall, 3) if wall else None,
+        "latency_p50_s": percentile(latencies, 0.50),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "retries": sum(metrics.snapshot()["retries"].values()) - retries_before,
+        "throttles": scheduler.snapshot().get("elevenlabs", {}).get("throttles", 0) - throttles_before,
+        "concurrency": concurrency,
+        "rate": rate,
+    }
+    with open(os.path.join(out_dir, REPORT), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"✅ {report['ok']} done, {report['failed']} failed, {report['skipped']} skipped "
+        f"in {report['wall_s']:.1f}s",
+    ]
+    if report["ok"]:
+        lines.append(f"   {report['items_per_s']:.2f} items/s, {report['audio_s_per_s']:.1f} s of audio per s, "
+                     f"latency p50 {report['latency_p50_s']:.2f}s p95 {report['latency_p95_s']:.2f}s, "
+                     f"{report['retries']} retries, {report['throttles']} rate-limit pauses")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk transcription / synthesis without mic or speakers")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name, help_ in (("transcribe", "audio files, directories or manifests"),
+                        ("synthesize", "text files, one prompt per line")):
+        p = sub.add_parser(name)
+        p.add_argument("inputs", nargs="+", help=help_)
+        p.add_argument("--out", required=True, help="output directory (also holds checkpoint and report)")
+        p.add_argument("--jobs", type=int, default=4, help="concurrent requests")
+        p.add_argument("--rate", type=float, help="max requests per second")
+        p.add_argument("--no-resume", action="store_true", help="redo items the checkpoint marks as done")
+    sub.choices["transcribe"].add_argument("--language", default="en")
+    args = ap.parse_args(argv)
+
+    if args.command == "transcribe":
+        jobs = _audio_files(args.inputs)
+        work = lambda path, out, key: transcribe_file(path, out, key, args.language)  # noqa: E731
+    else:
+        jobs = _prompts(args.inputs)
+        work = synthesize_prompt
+
+    try:
+        report = run(jobs, work, args.out, concurrency=args.jobs, rate=args.rate, resume=not args.no_resume)
+    except ValueError as e:  # clashing inputs; what finished is in the checkpoint
+        print("❌", e)
+        return 2
+    print(format_report(report))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import threading
+import time
+import numpy as np
+from Core import tracing
+from Core.audio_levels import levels
+from .vad import VoiceActivityDetector, frame_rms
+
+# sounddevice (PortAudio) is imported when the stream is opened
+
+
+class UtteranceCapture:
+    """
+    Microphone capture on a sounddevice callback stream into one preallocated
+    int16 buffer, so an utterance costs the same memory however long it is.
+
+    Before speech starts the front of the buffer is a ring holding the last
+    preroll_ms of audio. On "start" that preroll is rotated into place and
+    the utterance is appended after it until the detector reports "end" or
+    max_seconds is reached. record() returns a view of the buffer, valid
+    until the next record().
+
+        with UtteranceCapture(16000) as mic:
+            audio = mic.record()
+
+    - detector: has frame_len and update(level) -> "start" / "end" / None
+      (VoiceActivityDetector by default, see also vad.SilenceDetector)
+    - max_seconds: cap on one utterance; longer speech is cut off (truncated=True)
+    - preroll_ms: audio kept from before speech onset so the first syllable isn't clipped
+    - meter: publish frames to the audio level meter; the callback only copies
+      the newest frame aside, record()'s thread runs the FFT
+    """
+
+    def __init__(self, samplerate: int = 16000, detector=None, max_seconds: float = 30.0,
+                 preroll_ms: int = 300, meter: bool = True):
+        self.samplerate = samplerate
+        self.detector = detector or VoiceActivityDetector(samplerate)
+        self.frame_len = self.detector.frame_len
+        self.preroll = int(samplerate * preroll_ms / 1000)
+        self.capacity = self.preroll + int(samplerate * max_seconds)
+
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self._rotate = np.empty(self.preroll, dtype=np.int16)
+        self._scratch = np.empty(self.frame_len, dtype=np.float32)
+        self._meter = levels().mic if meter else None
+        self._meter_frame = np.zeros(self.frame_len, dtype=np.int16)
+        self._meter_len = 0
+        self._meter_seq = 0        # bumped by the callback per stashed frame
+        self._meter_published = 0
+        self._stream = None
+        self._done = threading.Event()
+        self._armed = False  # the callback only touches the buffer while armed
+
+        self.level = 0.0        # RMS of the last frame (int16 scale)
+        self.overflows = 0      # callbacks PortAudio flagged (e.g. input overflow)
+        self.truncated = False
+        self._turn = None
+        self._length = 0
+
+    # ---------- Stream ----------
+
+    def open(self):
+        import sounddevice as sd
+        self._stream = sd.InputStream(samplerate=self.samplerate, channels=1, dtype="int16",
+                                      blocksize=self.frame_len, callback=self._callback)
+        self._stream.start()
+        return self
+
+    def close(self):
+        self._armed = False
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ---------- Public ----------
+
+    def record(self, timeout: float = None) -> np.ndarray:
+        """
+        Block until one utterance has been captured and return it as an int16
+        view (empty if the detector ended without speech). On timeout, what
+        was captured so far is returned.
+        """
+        self._turn = tracing.current()  # the callback thread has no context of its own
+        self._pos = 0        # ring write position while waiting for speech
+        self._filled = 0     # preroll samples held in the ring
+        self._length = 0     # utterance samples at the front of the buffer
+        self._started = False
+        self.truncated = False
+        self._done.clear()
+        self._armed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # wake once per frame to publish levels outside the PortAudio callback
+        while not self._done.wait(self.frame_len / self.samplerate):
+            self._publish_level()
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self._armed = False
+        return self.buffer[:self._length]
+
+    def _publish_level(self):
+        seq = self._meter_seq
+        if self._meter is None or seq == self._meter_published:
+            return
+        frame = self._meter_frame[:self._meter_len].copy()
+        if self._meter_seq == seq:  # not overwritten by the callback while copying
+            self._meter.publish(frame, self.samplerate)
+        self._meter_published = seq
+
+    # ---------- Callback (PortAudio thread) ----------
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.overflows += 1
+        if not self._armed:
+            return
+
+        frame = indata[:, 0]
+        if frames > len(self._scratch):
+            self._scratch = np.empty(frames, dtype=np.float32)
+        self.level = frame_rms(frame, self._scratch)
+        if self._meter is not None:
+            n = min(frames, len(self._meter_frame))
+            self._meter_frame[:n] = frame[:n]
+            self._meter_len = n
+            self._meter_seq += 1
+        event = self.detector.update(self.level)
+
+        if not self._started:
+            if event == "start":
+                self._started = True
+                self._mark("speech_start")
+                self._unroll()
+                self._append(frame)
+            else:
+                self._ring_write(frame)
+                if event == "end":  # the detector gave up before anyone spoke
+                    self._finish()
+            return
+
+        self._append(frame)
+        if event == "end" or self._length >= self.capacity:
+            self.truncated = event != "end"
+            self._finish()
+
+    def _ring_write(self, x):
+        ring = self.preroll
+        if not ring:
+            return
+        x = x[-ring:]
+        n, i = len(x), self._pos
+        k = min(n, ring - i)
+        self.buffer[i:i + k] = x[:k]
+        self.buffer[:n - k] = x[k:]
+        self._pos = (i + n) % ring
+        self._filled = min(ring, self._filled + n)
+
+    def _unroll(self):
+        """Rotate the preroll ring so it reads oldest-first from index 0."""
+        if self._filled == self.preroll and self._pos:
+            i, ring = self._pos, self.preroll
+            self._rotate[:ring - i] = self.buffer[i:ring]
+            self._rotate[ring - i:] = self.buffer[:i]
+            self.buffer[:ring] = self._rotate
+        self._length = self._filled
+
+    def _append(self, x):
+        n = min(len(x), self.capacity - self._length)
+        self.buffer[self._length:self._length + n] = x[:n]
+        self._length += n
+
+    def _mark(self, name: str):
+        if self._turn is not None:
+            self._turn.mark(name)
+
+    def _finish(self):
+        self._armed = False
+        self._mark("vad_end")
+        self._done.set()
@@ -0,0 +1,66 @@
+"""
+Local stand-in for a streaming transcription service.
+
+Accepts chunked (or fixed-length) raw PCM POSTs, waits `delay` seconds to
+emulate model time and answers {"text": ...}. Used with StreamingHTTPBackend
+to measure end-of-speech -> text latency without network or API keys.
+
+    python -m SpeechRecog.local_stt_server --port 8765 --text "hello jessica"
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _read_body(handler) -> bytes:
+    if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int(handler.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                handler.rfile.readline()
+                return b"".join(parts)
+            parts.append(handler.rfile.read(size))
+            handler.rfile.readline()
+    return handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+
+
+def make_handler(text: str = None, delay: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = _read_body(self)
+            time.sleep(delay)
+            reply = text if text is not None else f"{len(body) // 2} samples"
+            payload = json.dumps({"text": reply}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve_in_thread(port: int = 0, text: str = None, delay: float = 0.0):
+    """Start the server on a daemon thread; returns (server, url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(text, delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/stt"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--text", default=None)
+    ap.add_argument("--delay", type=float, default=0.0)
+    args = ap.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.text, args.delay))
+    print(f"Local STT listening on http://127.0.0.1:{args.port}/v1/stt")
+    server.serve_forever()
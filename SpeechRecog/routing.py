@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import deque
+from Core.env import getenv
+from Core.tracing import percentile
+
+# Which engine serves speech: "auto" (ElevenLabs with on-device failover),
+# "remote" (ElevenLabs only) or "local" (on-device only)
+MODES = ("auto", "remote", "local")
+
+
+def mode(kind: str) -> str:
+    """JESSICA_STT_BACKEND / JESSICA_TTS_BACKEND, "auto" if unset."""
+    value = (getenv(f"JESSICA_{kind.upper()}_BACKEND") or "auto").lower()
+    if value not in MODES:
+        print(f"⚠️ JESSICA_{kind.upper()}_BACKEND={value!r} is not one of {MODES}, using auto")
+        value = "auto"
+    return value
+
+
+def deadline(kind: str, default: float) -> float:
+    """JESSICA_STT_DEADLINE / JESSICA_TTS_DEADLINE in seconds."""
+    return float(getenv(f"JESSICA_{kind.upper()}_DEADLINE") or default)
+
+
+class BackendHealth:
+    """
+    Rolling response times of one backend. The router skips a backend for
+    `cooldown` seconds once it has failed (or missed its deadline)
+    `max_failures` times in a row, or its recent p90 is over the deadline;
+    the first request after the cooldown probes it again.
+    - window: how many recent latencies the percentiles cover
+    """
+
+    def __init__(self, name: str, window: int = 20, max_failures: int = 2, cooldown: float = 30.0):
+        self.name = name
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.latencies = deque(maxlen=window)
+        self.failures = 0
+        self.requests = 0
+        self.skipped = 0
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def healthy(self) -> bool:
+        with self._lock:
+            if time.monotonic() < self._until:
+                self.skipped += 1
+                return False
+            return True
+
+    def record(self, seconds: float, ok: bool = True, deadline: float = None):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+            self.failures = 0 if ok else self.failures + 1
+            slow = deadline is not None and len(self.latencies) >= 3 and percentile(self.latencies, 0.9) > deadline
+            if self.failures >= self.max_failures or slow:
+                self._until = time.monotonic() + self.cooldown
+                self.failures = 0
+                self.latencies.clear()  # judge the probe on its own
+                print(f"⚠️ {self.name} is {'slow' if slow else 'failing'}, "
+                      f"using the local engine for {self.cooldown:.0f}s")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "skipped": self.skipped,
+                "p50_ms": 1000 * percentile(self.latencies, 0.5) if self.latencies else None,
+                "p90_ms": 1000 * percentile(self.latencies, 0.9) if self.latencies else None,
+                "cooling_down": time.monotonic() < self._until,
+            }
+
+
+# one per remote service, shared by every router instance in the process
+health = {
+    "stt": BackendHealth("ElevenLabs STT"),
+    "tts": BackendHealth("ElevenLabs TTS"),
+}
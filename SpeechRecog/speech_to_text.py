@@ -1,73 +1,86 @@
-import os
-import tempfile
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
-import requests
-from dotenv import load_dotenv
+from collections import deque
+from Core import tracing
+from Core.audio_levels import levels
+from .capture import UtteranceCapture
+from .vad import SilenceDetector, VoiceActivityDetector
+from .stt_backends import default_backend
 
-# Load API key
-load_dotenv()
-ELEVEN_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# sounddevice (PortAudio) is imported when recording starts, and the API key
+# is checked when a backend is built, so importing this module has no side effects.
 
-if not ELEVEN_API_KEY:
-    raise ValueError("❌ ELEVENLABS_API_KEY not found in .env file!")
 
-STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
-
-
-def listen_microphone(samplerate: int = 44100, silence_threshold=500, silence_duration=6):
+def listen_microphone(samplerate: int = 44100, silence_threshold=500, silence_duration=6,
+                      backend=None, max_seconds: float = 60.0):
     """
-    Record until user stops speaking (detected via silence), then send to ElevenLabs for transcription.
+    Record until user stops speaking (detected via silence), then transcribe it.
     - silence_threshold: RMS level to treat as silence
     - silence_duration: seconds of silence before stopping
+    - backend: a TranscriptionBackend (defaults to stt_backends.default_backend():
+      ElevenLabs with on-device failover)
+    - max_seconds: longest utterance kept; capture memory is preallocated for it
     """
+    backend = backend or default_backend()
     print("🎙️ Listening... Start speaking (stop when you're done).")
 
-    buffer = []
-    silence_counter = 0
-    chunk_size = int(0.3 * samplerate)  # 300ms chunks
-
-    with sd.InputStream(samplerate=samplerate, channels=1, dtype="int16") as stream:
-        while True:
-            chunk, _ = stream.read(chunk_size)
-            buffer.append(chunk)
-
-            rms = np.sqrt(np.mean(chunk**2))
-            if rms < silence_threshold:
-                silence_counter += chunk_size / samplerate
-            else:
-                silence_counter = 0
-
-            # Stop if silence lasts long enough
-            if silence_counter > silence_duration:
-                break
+    detector = SilenceDetector(samplerate, threshold=silence_threshold, silence_duration=silence_duration)
+    with UtteranceCapture(samplerate, detector, max_seconds=max_seconds) as mic:
+        audio = mic.record()
 
     print("✅ Recording stopped.")
+    if not len(audio):
+        print("⚠️ No speech detected.")
+        return None
 
-    # Combine all chunks
-    audio_data = np.concatenate(buffer, axis=0)
+    # the backend resamples / encodes straight from the capture buffer
+    backend.start(samplerate)
+    backend.push(audio)
+    return backend.finish()
 
-    # Save temp WAV
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
-        sf.write(tmpfile.name, audio_data, samplerate)
-        audio_path = tmpfile.name
 
-    # Send to ElevenLabs
-    headers = {"xi-api-key": ELEVEN_API_KEY}
-    files = {"file": open(audio_path, "rb")}
-    data = {"model_id": "scribe_v1", "language_code": "en", "diarize": False, "tag_audio_events": False}
+def listen_streaming(backend=None, samplerate: int = 16000, frame_ms: int = 30,
+                     hangover_ms: int = 500, preroll_ms: int = 300, max_seconds: float = 30.0):
+    """
+    Record one utterance with VAD endpointing and stream it to a transcription backend.
+    - backend: a TranscriptionBackend (defaults to stt_backends.default_backend())
+    - hangover_ms: trailing silence that ends the utterance
+    - preroll_ms: audio kept from before speech onset so the first syllable isn't clipped
+    """
+    import sounddevice as sd
+    backend = backend or default_backend()
+    vad = VoiceActivityDetector(samplerate, frame_ms=frame_ms, hangover_ms=hangover_ms)
+    preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+    max_frames = int(max_seconds * 1000 / frame_ms)
+    started = False
+    frames = 0
 
-    # print("📡 Sending audio to ElevenLabs...")
-    response = requests.post(STT_URL, headers=headers, files=files, data=data)
+    print("🎙️ Listening... Start speaking (stop when you're done).")
 
-    if response.status_code == 200:
-        result = response.json()
-        # print("📝 Transcription:", result["text"])
-        return result["text"]
-    else:
-        print("❌ API Error:", response.status_code, response.text)
-        return None
+    meter = levels().mic
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype="int16",
+                        blocksize=vad.frame_len) as stream:
+        while True:
+            frame, _ = stream.read(vad.frame_len)
+            meter.publish(frame, samplerate)
+            event = vad.process(frame)
+
+            if not started:
+                preroll.append(frame)
+                if event == "start":
+                    tracing.mark("speech_start")
+                    started = True
+                    backend.start(samplerate)
+                    for f in preroll:
+                        backend.push(f)
+                continue
+
+            backend.push(frame)
+            frames += 1
+            if event == "end" or frames >= max_frames:
+                break
+
+    tracing.mark("vad_end")
+    print("✅ Recording stopped.")
+    return backend.finish()
 
 
 # -------------------------------
@@ -0,0 +1,292 @@
+import time
+import queue
+import threading
+import numpy as np
+from Core import tracing
+from Core.env import elevenlabs_url, getenv, require
+from Core.transport import post
+from . import routing
+from .audio_codec import resample, encode
+
+STT_PATH = "/v1/speech-to-text"
+
+
+class TranscriptionBackend:
+    """
+    Streaming transcription interface used by listen_streaming().
+    start() is called at speech onset, push() for every captured int16 frame,
+    finish() at end of speech and returns the text (None on error), or
+    close() instead when the utterance is abandoned.
+    last_latency holds the seconds finish() took, i.e. end-of-speech -> text.
+    """
+
+    last_latency = None
+
+    def start(self, samplerate: int):
+        raise NotImplementedError
+
+    def push(self, chunk):
+        raise NotImplementedError
+
+    def finish(self):
+        t0 = time.perf_counter()
+        tracing.mark("stt_start")
+        try:
+            return self._finish()
+        finally:
+            self.last_latency = time.perf_counter() - t0
+            tracing.mark("stt_end", last=True)
+
+    def _finish(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Drop the utterance without transcribing it."""
+        self._chunks = []
+
+
+class ElevenLabsBackend(TranscriptionBackend):
+    """
+    ElevenLabs scribe. Its endpoint only takes whole files, so frames are
+    buffered and uploaded in one request at end of speech.
+    """
+
+    def __init__(self, api_key: str = None, url: str = None, language_code: str = "en",
+                 target_rate: int = 16000, codec: str = "flac"):
+        self.api_key = api_key or require("ELEVENLABS_API_KEY")
+        self.url = url or elevenlabs_url(STT_PATH)
+        self.language_code = language_code
+        self.target_rate = target_rate
+        self.codec = codec
+
+    def start(self, samplerate: int):
+        self.samplerate = samplerate
+        self._chunks = []
+        self._closed = False
+
+    def push(self, chunk):
+        self._chunks.append(chunk)
+
+    def close(self):
+        self._closed = True
+        self._chunks = []
+
+    def _finish(self):
+        audio = resample(np.concatenate(self._chunks, axis=0), self.samplerate, self.target_rate)
+        payload, filename, mime = encode(audio, self.target_rate, self.codec)
+        self._chunks = []
+
+        headers = {"xi-api-key": self.api_key}
+        files = {"file": (filename, payload, mime)}
+        data = {"model_id": "scribe_v1", "language_code": self.language_code,
+                "diarize": False, "tag_audio_events": False}
+        response = post(self.url, endpoint="stt", headers=headers, files=files, data=data)
+
+        if self._closed:  # abandoned while in flight (FailoverBackend's deadline): drop the reply
+            response.close()
+            return None
+        if response.status_code == 200:
+            return response.json()["text"]
+        print("❌ API Error:", response.status_code, response.text)
+        return None
+
+
+class StreamingHTTPBackend(TranscriptionBackend):
+    """
+    Uploads raw 16-bit PCM with chunked transfer encoding while the user is
+    still talking, so only the tail of the audio is in flight at end of speech.
+    The server answers with JSON {"text": ...}. Point it at
+    SpeechRecog/local_stt_server.py to measure endpoint latency offline.
+    """
+
+    def __init__(self, url: str, headers: dict = None, timeout: float = 30.0):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def start(self, samplerate: int):
+        self._q = queue.Queue()
+        self._response = None
+        self._error = None
+        headers = dict(self.headers)
+        headers["Content-Type"] = f"audio/L16; rate={samplerate}; channels=1"
+        self._thread = threading.Thread(target=self._upload, args=(headers,), daemon=True)
+        self._thread.start()
+
+    def push(self, chunk):
+        self._q.put(np.ascontiguousarray(chunk, dtype=np.int16).tobytes())
+
+    def _body(self):
+        while True:
+            data = self._q.get()
+            if data is None:
+                return
+            yield data
+
+    def _upload(self, headers):
+        try:
+            # a generator body can't be replayed, so no retries here
+            self._response = post(self.url, endpoint="stt", retries=0, data=self._body(),
+                                  headers=headers, timeout=self.timeout)
+        except Exception as e:  # network errors, RateLimitTimeout from the scheduler, ...
+            self._error = e
+
+    def close(self):
+        # end the upload; its response is never read
+        self._q.put(None)
+
+    def _finish(self):
+        self._q.put(None)
+        self._thread.join()
+        if self._error is not None or self._response is None:
+            print("❌ STT Error:", self._error or "upload ended without a response")
+            return None
+        if self._response.status_code != 200:
+            print("❌ API Error:", self._response.status_code, self._response.text)
+            return None
+        return self._response.json()["text"]
+
+
+_recognizer = None
+_recognizer_lock = threading.Lock()
+# speech_recognition engine -> the package it needs
+_ENGINE_PACKAGES = {"sphinx": "pocketsphinx", "vosk": "vosk", "faster_whisper": "faster_whisper",
+                    "whisper": "whisper"}
+_missing_reported = set()
+
+
+class LocalBackend(TranscriptionBackend):
+    """
+    On-device transcription through the speech_recognition package, so it
+    keeps working without network or API key.
+    - engine: speech_recognition recognizer to use, e.g. "sphinx" (pocketsphinx,
+      a project dependency), "vosk" or "faster_whisper"; JESSICA_LOCAL_STT by default
+    If the engine's package isn't installed, finish() returns None (after one
+    warning per engine), so failover has nothing to fall back to and the
+    utterance is lost whenever ElevenLabs is slow or down.
+    """
+
+    def __init__(self, engine: str = None, target_rate: int = 16000):
+        self.engine = engine or getenv("JESSICA_LOCAL_STT", "sphinx")
+        self.target_rate = target_rate
+
+    def start(self, samplerate: int):
+        self.samplerate = samplerate
+        self._chunks = []
+
+    def push(self, chunk):
+        self._chunks.append(chunk)
+
+    def available(self) -> bool:
+        """Whether the engine's package is installed (without importing it)."""
+        import importlib.util
+        package = _ENGINE_PACKAGES.get(self.engine)
+        return package is None or importlib.util.find_spec(package) is not None
+
+    def _finish(self):
+        global _recognizer
+        if not self.available():
+            if self.engine not in _missing_reported:
+                _missing_reported.add(self.engine)
+                print(f"⚠️ Local STT engine {self.engine!r} needs `pip install {_ENGINE_PACKAGES[self.engine]}`; "
+                      "utterances ElevenLabs can't transcribe are dropped")
+            return None
+        import speech_recognition as sr
+        audio = resample(np.concatenate(self._chunks, axis=0), self.samplerate, self.target_rate)
+        self._chunks = []
+        with _recognizer_lock:
+            if _recognizer is None:
+                _recognizer = sr.Recognizer()
+            try:
+                return getattr(_recognizer, "recognize_" + self.engine)(
+                    sr.AudioData(audio.tobytes(), self.target_rate, 2))
+            except sr.UnknownValueError:
+                return ""  # heard nothing intelligible
+            except Exception as e:  # engine missing, model not downloaded, ...
+                print("❌ Local STT Error:", e)
+                return None
+
+
+class FailoverBackend(TranscriptionBackend):
+    """
+    ElevenLabs first, the local engine when it fails, takes longer than
+    `deadline` seconds, or has recently been slow / failing (see
+    routing.BackendHealth). Frames go to the primary as they arrive and are
+    replayed into the fallback only if it is needed.
+    """
+
+    def __init__(self, primary=None, fallback=None, deadline: float = None):
+        self.primary = primary or ElevenLabsBackend()
+        self.fallback = fallback or LocalBackend()
+        self.deadline = deadline if deadline is not None else routing.deadline("stt", 3.0)
+        self.health = routing.health["stt"]
+        self.used = None  # the backend that produced the last transcript
+
+    def start(self, samplerate: int):
+        self.samplerate = samplerate
+        self._chunks = []
+        self._use_primary = self.health.healthy()
+        if self._use_primary:
+            self.primary.start(samplerate)
+
+    def push(self, chunk):
+        self._chunks.append(chunk)
+        if self._use_primary:
+            self.primary.push(chunk)
+
+    def _finish(self):
+        if self._use_primary:
+            result = {}
+            done = threading.Event()
+            t0 = time.perf_counter()
+
+            def work():
+                text = None
+                try:
+                    text = self.primary._finish()
+                except Exception as e:
+                    print("❌ STT Error:", e)
+                finally:
+                    # the real latency, also when _finish stopped waiting at the deadline
+                    elapsed = time.perf_counter() - t0
+                    self.health.record(elapsed, ok=text is not None and elapsed <= self.deadline,
+                                       deadline=self.deadline)
+                    result["text"] = text
+                    done.set()
+
+            threading.Thread(target=work, daemon=True).start()
+            if done.wait(self.deadline) and result["text"] is not None:
+                self.used = self.primary
+                self._chunks = []
+                return result["text"]
+            if not done.is_set():
+                print(f"⚠️ ElevenLabs STT took over {self.deadline:.1f}s, transcribing locally")
+                self.primary.close()
+
+        self.used = self.fallback
+        self.fallback.start(self.samplerate)
+        for chunk in self._chunks:
+            self.fallback.push(chunk)
+        self._chunks = []
+        return self.fallback._finish()
+
+    def close(self):
+        if self._use_primary:
+            self.primary.close()
+        self._chunks = []
+
+
+def default_backend(language_code: str = "en") -> TranscriptionBackend:
+    """
+    A fresh backend for one utterance, per JESSICA_STT_BACKEND (see routing.mode).
+    - language_code: passed to ElevenLabs, also when it sits behind failover
+    """
+    choice = routing.mode("stt")
+    if choice == "local":
+        return LocalBackend()
+    if choice == "remote":
+        return ElevenLabsBackend(language_code=language_code)
+    try:
+        return FailoverBackend(primary=ElevenLabsBackend(language_code=language_code))
+    except ValueError:  # no ElevenLabs key: on-device only
+        return LocalBackend()
@@ -1,59 +1,208 @@
-import os
 import re
-import io
-import requests
-from dotenv import load_dotenv
-from pydub import AudioSegment
-from pydub.playback import play
+from concurrent.futures import ThreadPoolExecutor
+from Core import tracing
+from Core.env import elevenlabs_url, require
+from Core.scheduler import BATCH, scheduler
+from Core.transport import post
+from .tts_cache import TTSCache, CachedAudio, cache_key
 
-# -------------------------------
-# FORCE ffmpeg & ffprobe paths
-# -------------------------------
-ffmpeg_path = r"C:\Users\srija\Downloads\ffmpeg-8.0-essentials_build\ffmpeg-8.0-essentials_build\bin\ffmpeg.exe"
-ffprobe_path = r"C:\Users\srija\Downloads\ffmpeg-8.0-essentials_build\ffmpeg-8.0-essentials_build\bin\ffprobe.exe"
+# NumPy and sounddevice are imported on first use so importing this module
+# stays cheap and never touches the network or the audio device.
 
-AudioSegment.converter = ffmpeg_path
-AudioSegment.ffprobe = ffprobe_path
+voice_id = "1qEiC6qsybMkmnNdVMbK"  # Jessica’s voice ID
+model_id = "eleven_monolingual_v1"
+TTS_PATH = f"/v1/text-to-speech/{voice_id}/stream"
+url = None  # set to override the endpoint; by default ELEVENLABS_API_BASE + TTS_PATH
 
-os.environ["PATH"] += os.pathsep + os.path.dirname(ffmpeg_path)
-os.environ["FFMPEG_BINARY"] = ffmpeg_path
-os.environ["FFPROBE_BINARY"] = ffprobe_path
+# Raw 16-bit mono PCM instead of MP3: nothing to decode (no ffmpeg), and
+# playback starts on the first chunk instead of after the whole download.
+OUTPUT_FORMAT = "pcm_22050"
+SAMPLE_RATE = 22050
+GAIN_DB = 5.0       # the boost the old MP3 path applied (audio + 5)
+CHUNK_BYTES = 4096  # per network read, ~93 ms of audio
+PLAY_FRAMES = 1024  # per output write; short writes keep stop_playback() snappy
 
-load_dotenv()
-api_key = os.getenv("ELEVENLABS_API_KEY")
+_GAIN = 10 ** (GAIN_DB / 20)
 
-if not api_key:
-    raise ValueError("❌ ELEVENLABS_API_KEY not found. Add it in your .env file!")
 
-voice_id = "1qEiC6qsybMkmnNdVMbK"  # Jessica’s voice ID
-url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+def _headers() -> dict:
+    return {
+        "xi-api-key": require("ELEVENLABS_API_KEY"),
+        "Content-Type": "application/json"
+    }
 
-headers = {
-    "xi-api-key": api_key,
-    "Accept": "audio/mpeg",   # <- ✅ force MP3, works reliably
-    "Content-Type": "application/json"
-}
 
-def speak_text(text: str):
-    text = re.sub(r"\(.*?\)", "", text).strip()
-    data = {"text": text, "model_id": "eleven_monolingual_v1"}
-    response = requests.post(url, headers=headers, json=data)
+# Phrases Jessica says all the time; warm_up() renders them once at startup
+COMMON_PHRASES = [
+    "Hello there! Jessica is now speaking! How can i help you",
+    "Bye Sir",
+    "Sure.",
+    "Okay.",
+    "Got it.",
+    "One moment.",
+]
+
+cache = TTSCache()
+
+
+def _apply_gain(data, scratch):
+    """
+    int16 samples of data with the gain applied via the float32 scratch buffer
+    (saturating); scratch must hold at least len(data) // 2 samples.
+    """
+    import numpy as np
+    src = np.frombuffer(data, dtype=np.int16)
+    buf = scratch[:len(src)]
+    np.multiply(src, _GAIN, out=buf)
+    np.clip(buf, -32768, 32767, out=buf)
+    return buf.astype(np.int16)
+
+
+def clean_text(text: str) -> str:
+    """What actually gets spoken: stage directions like "(laughs)" are dropped."""
+    return re.sub(r"\(.*?\)", "", text).strip()
+
+
+def synthesize_stream(text: str):
+    """
+    Yield int16 PCM chunks (SAMPLE_RATE, mono) for text as they arrive from
+    ElevenLabs. Complete clips are cached; hits are yielded from the cache.
+    """
+    import numpy as np
+    text = clean_text(text)
+    if not text:
+        return
+
+    tracing.mark("tts_request")
+    key = cache_key(voice_id, f"{model_id}/{OUTPUT_FORMAT}", text)
+    cached = cache.get(key)
+    if cached is not None:
+        tracing.mark("tts_first_byte")
+        samples = np.frombuffer(cached.pcm, dtype=np.int16)
+        for i in range(0, len(samples), PLAY_FRAMES):
+            yield samples[i:i + PLAY_FRAMES]
+        return
+
+    data = {"text": text, "model_id": model_id}
+    response = post(url or elevenlabs_url(TTS_PATH), endpoint="tts", headers=_headers(), json=data,
+                    params={"output_format": OUTPUT_FORMAT}, stream=True, cost=len(text))
 
     if response.status_code != 200:
         print("❌ API Error:", response.status_code, response.text)
+        response.close()
         return
 
+    pcm = bytearray()
+    scratch = np.empty(CHUNK_BYTES // 2 + 1, dtype=np.float32)
+    carry = b""
+    complete = False
     try:
-        # ✅ Load MP3, not WAV
-        audio = AudioSegment.from_file(io.BytesIO(response.content), format="mp3")
-        louder = audio + 5
-        print("🔊 Playing Jessica's voice...")
-        play(louder)
-        print("✅ Playback finished.")
+        for data in response.iter_content(CHUNK_BYTES):
+            if carry:
+                data = carry + data
+            n = len(data) & ~1  # a read can end mid-sample
+            carry = data[n:]
+            if n == 0:
+                continue
+            tracing.mark("tts_first_byte")
+            if n // 2 > len(scratch):  # reads aren't guaranteed to stay within CHUNK_BYTES
+                scratch = np.empty(n // 2, dtype=np.float32)
+            chunk = _apply_gain(memoryview(data)[:n], scratch)
+            pcm += chunk.data
+            yield chunk
+        complete = True
+    except Exception as e:
+        print("❌ Stream Error:", e)
+    finally:
+        response.close()
+        # a cancelled or broken stream is not cached
+        if complete and pcm:
+            cache.put(key, CachedAudio(bytes(pcm), SAMPLE_RATE, 1, 2))
+
+
+def synthesize(text: str):
+    """
+    Return the whole clip for text as CachedAudio, from the cache or ElevenLabs (None on error).
+    Concurrent calls for the same text share one request.
+    """
+    import numpy as np
+
+    def fetch():
+        chunks = list(synthesize_stream(text))
+        if not chunks:
+            return None
+        return CachedAudio(np.concatenate(chunks).tobytes(), SAMPLE_RATE, 1, 2)
+
+    key = ("tts", cache_key(voice_id, f"{model_id}/{OUTPUT_FORMAT}", clean_text(text)))
+    return scheduler.coalesce(key, fetch)
+
+
+def warm_up(phrases=COMMON_PHRASES, workers: int = 4):
+    """Pre-synthesize phrases into the cache (behind live requests); returns the cache stats afterwards."""
+    def fill(text):
+        with scheduler.priority(BATCH):
+            return synthesize(text)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(fill, phrases))
+    return cache.stats()
+
+
+_stop_gen = 0  # bumped by stop_playback(); playback started under an older value stops
+
+
+def play_pcm(chunks, samplerate: int = SAMPLE_RATE, channels: int = 1):
+    """
+    Blocking playback of an iterable of interleaved int16 chunks, written to
+    a sounddevice output stream as they come (the device is opened on the
+    first chunk). Each block is published to the audio level meter.
+    stop_playback() from another thread cuts it short.
+    """
+    import sounddevice as sd
+    from Core.audio_levels import levels
+    meter = levels().playback
+    gen = _stop_gen
+    stream = None
+    step = PLAY_FRAMES * channels
+    try:
+        for chunk in chunks:
+            if stream is None:
+                stream = sd.OutputStream(samplerate=samplerate, channels=channels, dtype="int16")
+                stream.start()
+            for i in range(0, len(chunk), step):
+                if gen != _stop_gen:
+                    break
+                block = chunk[i:i + step].reshape(-1, channels)
+                tracing.mark("playback_start")
+                stream.write(block)
+                meter.publish(block, samplerate)
+            if gen != _stop_gen:
+                break
     except Exception as e:
         print("❌ Playback Error:", e)
+    finally:
+        if stream is not None:
+            if gen != _stop_gen:
+                stream.abort()  # drop what is still queued in the device
+            else:
+                stream.stop()   # let it drain
+            stream.close()
+            tracing.mark("playback_end", last=True)
+
+
+def play_audio(audio):
+    """Blocking playback of a whole CachedAudio clip."""
+    import numpy as np
+    play_pcm([np.frombuffer(audio.pcm, dtype=np.int16)], audio.frame_rate, audio.channels)
 
-# -------------------------------
-# Test Run
-# -------------------------------
-speak_text("Hello there! Jessica is now speaking! How can i help you")
+
+def stop_playback():
+    global _stop_gen
+    _stop_gen += 1
+
+
+def speak_text(text: str):
+    from .tts_backends import speech_stream  # ElevenLabs with on-device failover, see routing.py
+    print("🔊 Playing Jessica's voice...")
+    play_pcm(speech_stream(text))
+    print("✅ Playback finished.")
@@ -0,0 +1,160 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+from Core import tracing
+from . import routing
+from .text_to_speech import PLAY_FRAMES, SAMPLE_RATE, clean_text, synthesize_stream
+
+# Every backend yields int16 mono chunks at text_to_speech.SAMPLE_RATE, so
+# play_pcm() and SpeechPipeline don't care which one spoke.
+
+_DONE = object()
+
+
+class ElevenLabsTTS:
+    """Jessica's ElevenLabs voice (streamed, cached)."""
+
+    name = "elevenlabs"
+
+    def stream(self, text: str):
+        return synthesize_stream(text)
+
+
+class LocalTTS:
+    """
+    The on-device voice of pyttsx3 (eSpeak / SAPI5 / NSSpeechSynthesizer).
+    It renders a sentence to a temporary file in well under a second, so the
+    whole clip is produced before the first chunk is yielded.
+    """
+
+    name = "local"
+
+    def __init__(self, rate: int = 185):
+        self.rate = rate
+        self._engine = None
+        self._lock = threading.Lock()  # one engine, and it isn't thread-safe
+
+    def stream(self, text: str):
+        import numpy as np
+        import soundfile as sf
+        from .audio_codec import resample
+        text = clean_text(text)
+        if not text:
+            return
+        tracing.mark("tts_request")
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                if self._engine is None:
+                    import pyttsx3
+                    self._engine = pyttsx3.init()
+                    self._engine.setProperty("rate", self.rate)
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+            audio, rate = sf.read(path, dtype="int16")
+        except Exception as e:
+            print("❌ Local TTS Error:", e)
+            return
+        finally:
+            os.remove(path)
+        samples = resample(audio, rate, SAMPLE_RATE)
+        tracing.mark("tts_first_byte")
+        for i in range(0, len(samples), PLAY_FRAMES):
+            yield np.ascontiguousarray(samples[i:i + PLAY_FRAMES])
+
+
+class FailoverTTS:
+    """
+    Streams from the primary (ElevenLabs) unless its first chunk takes longer
+    than `deadline` seconds, it fails, or it has recently been slow / failing
+    (see routing.BackendHealth); then the sentence is spoken by the fallback.
+    Once the primary's audio has started it is played to the end.
+    """
+
+    def __init__(self, primary=None, fallback=None, deadline: float = None):
+        self.primary = primary or ElevenLabsTTS()
+        self.fallback = fallback or LocalTTS()
+        self.deadline = deadline if deadline is not None else routing.deadline("tts", 1.0)
+        self.health = routing.health["tts"]
+        self.served = {self.primary.name: 0, self.fallback.name: 0}
+
+    def stream(self, text: str):
+        if not clean_text(text):
+            return
+        if self.health.healthy():
+            chunks = queue.SimpleQueue()
+            stop = threading.Event()
+            turn = tracing.current()
+            t0 = time.perf_counter()
+
+            def pump():
+                tracing.activate(turn)
+                stream = self.primary.stream(text)
+                waiting = True  # for the first chunk
+                try:
+                    for chunk in stream:
+                        if waiting:
+                            waiting = False
+                            # the real time to first audio, also when stream() gave up on it
+                            elapsed = time.perf_counter() - t0
+                            self.health.record(elapsed, ok=elapsed <= self.deadline, deadline=self.deadline)
+                        if stop.is_set():
+                            break
+                        chunks.put(chunk)
+                except Exception as e:
+                    print("❌ TTS Error:", e)
+                finally:
+                    if waiting:
+                        self.health.record(time.perf_counter() - t0, ok=False, deadline=self.deadline)
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        close()  # an abandoned ElevenLabs stream releases its response here
+                    chunks.put(_DONE)
+
+            threading.Thread(target=pump, daemon=True).start()
+            try:
+                first = chunks.get(timeout=self.deadline)
+            except queue.Empty:
+                first = None
+                print(f"⚠️ ElevenLabs TTS gave no audio within {self.deadline:.1f}s, speaking locally")
+            ok = first is not None and first is not _DONE
+            if ok:
+                self.served[self.primary.name] += 1
+                try:
+                    yield first
+                    while (chunk := chunks.get()) is not _DONE:
+                        yield chunk
+                finally:
+                    stop.set()
+                return
+            stop.set()
+
+        self.served[self.fallback.name] += 1
+        yield from self.fallback.stream(text)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    """The process-wide TTS backend, per JESSICA_TTS_BACKEND (see routing.mode)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            choice = routing.mode("tts")
+            if choice == "local":
+                _backend = LocalTTS()
+            elif choice == "remote":
+                _backend = ElevenLabsTTS()
+            else:
+                _backend = FailoverTTS()
+        return _backend
+
+
+def speech_stream(text: str):
+    """int16 PCM chunks (SAMPLE_RATE, mono) of text from the configured backend."""
+    return backend().stream(text)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import re
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+
+DEFAULT_DIR = os.getenv("JESSICA_TTS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "jessica", "tts"))
+
+
+@dataclass
+class CachedAudio:
+    """Raw PCM, so a hit plays without touching the network."""
+    pcm: bytes
+    frame_rate: int
+    channels: int
+    sample_width: int
+
+    @property
+    def size(self) -> int:
+        return len(self.pcm)
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(voice_id: str, model_id: str, text: str) -> str:
+    raw = f"{voice_id}\0{model_id}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Two tiers: an in-memory LRU of decoded clips in front of a size-capped
+    directory of WAV files (least recently used files are deleted first).
+    - memory_bytes / disk_bytes: caps on decoded PCM held in each tier
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, memory_bytes: int = 32 << 20,
+                 disk_bytes: int = 256 << 20):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._mem = OrderedDict()
+        self._mem_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".wav")
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._mem.get(key)
+            if audio is not None:
+                self._mem.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: CachedAudio):
+        with self._lock:
+            self._remember(key, audio)
+        self._write_disk(key, audio)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+                "memory_entries": len(self._mem),
+                "memory_bytes": self._mem_size,
+            }
+
+    # ---------- Memory tier ----------
+
+    def _remember(self, key: str, audio: CachedAudio):
+        if audio.size > self.memory_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_size -= old.size
+        self._mem[key] = audio
+        self._mem_size += audio.size
+        while self._mem_size > self.memory_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_size -= evicted.size
+
+    # ---------- Disk tier ----------
+
+    def _read_disk(self, key: str):
+        path = self._path(key)
+        try:
+            with wave.open(path, "rb") as w:
+                audio = CachedAudio(w.readframes(w.getnframes()), w.getframerate(),
+                                    w.getnchannels(), w.getsampwidth())
+            os.utime(path)  # mtime doubles as "last used" for eviction
+            return audio
+        except (FileNotFoundError, wave.Error, EOFError):
+            return None
+
+    def _write_disk(self, key: str, audio: CachedAudio):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)  # on first write, not at import
+            with wave.open(tmp, "wb") as w:
+                w.setnchannels(audio.channels)
+                w.setsampwidth(audio.sample_width)
+                w.setframerate(audio.frame_rate)
+                w.writeframes(audio.pcm)
+            os.replace(tmp, path)
+        except OSError as e:
+            print("❌ TTS cache write failed:", e)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".wav"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,166 @@
+import re
+import queue
+import threading
+
+from Core import tracing
+from .text_to_speech import play_pcm, stop_playback
+from .tts_backends import speech_stream
+
+# A sentence ends on . ! ? (or …) followed by whitespace. Waiting for the
+# whitespace keeps "3.5" or "..." at the end of a streamed chunk in one piece.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+_DONE = object()
+
+
+def _cut_sentences(buf: str):
+    """Split off every complete sentence in buf; returns (sentences, remainder)."""
+    sentences = []
+    while True:
+        m = _SENTENCE_END.search(buf)
+        if not m:
+            return sentences, buf
+        sentence, buf = buf[:m.end()].strip(), buf[m.end():]
+        if sentence:
+            sentences.append(sentence)
+
+
+def split_sentences(chunks):
+    """
+    Turn a stream of text chunks (e.g. LLM tokens) into complete sentences.
+    Whatever is left when the stream ends is yielded as the last sentence.
+    """
+    buf = ""
+    for chunk in chunks:
+        sentences, buf = _cut_sentences(buf + chunk)
+        yield from sentences
+    if buf.strip():
+        yield buf.strip()
+
+
+class _Clip:
+    """PCM chunks of one sentence, playable while the synth worker is still downloading it."""
+
+    def __init__(self, cancelled: threading.Event):
+        self._q = queue.SimpleQueue()
+        self._cancelled = cancelled
+
+    def put(self, chunk):
+        self._q.put(chunk)
+
+    def close(self):
+        self._q.put(_DONE)
+
+    def __iter__(self):
+        while not self._cancelled.is_set():
+            try:
+                chunk = self._q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is _DONE:
+                return
+            yield chunk
+
+
+class SpeechPipeline:
+    """
+    feed() text as it arrives -> sentences are streamed from TTS by one worker
+    and played back-to-back by another. A clip is handed to the player before
+    it has finished downloading, so sentence N starts on its first chunk and
+    N+1 downloads while N plays (and N+2 is still being generated).
+    - max_queued: how many clips may wait for the speaker
+    """
+
+    def __init__(self, max_queued: int = 2):
+        self._pending = ""
+        self.cancelled = threading.Event()
+        self._turn = tracing.current()  # workers record TTS / playback marks on the caller's turn
+        self._text_q = queue.Queue()
+        self._audio_q = queue.Queue(maxsize=max_queued)
+        self._synth = threading.Thread(target=self._synth_worker, daemon=True)
+        self._player = threading.Thread(target=self._playback_worker, daemon=True)
+        self._synth.start()
+        self._player.start()
+
+    def feed(self, text: str):
+        sentences, self._pending = _cut_sentences(self._pending + text)
+        for sentence in sentences:
+            self._text_q.put(sentence)
+
+    def close(self):
+        """Flush the last partial sentence and block until everything is played."""
+        if self._pending.strip():
+            self._text_q.put(self._pending.strip())
+        self._pending = ""
+        self._text_q.put(_DONE)
+        self._synth.join()
+        self._player.join()
+
+    def cancel(self):
+        """Drop everything not yet played and cut off the clip that is playing (barge-in)."""
+        self.cancelled.set()
+        self._pending = ""
+        for q in (self._text_q, self._audio_q):
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+        self._text_q.put(_DONE)
+        try:
+            self._audio_q.put_nowait(_DONE)
+        except queue.Full:
+            pass  # the player will see the cancel flag on its next clip
+        stop_playback()
+
+    # ---------- Workers ----------
+
+    def _synth_worker(self):
+        tracing.activate(self._turn)
+        try:
+            while True:
+                sentence = self._text_q.get()
+                if sentence is _DONE or self.cancelled.is_set():
+                    return
+                clip = _Clip(self.cancelled)
+                self._put_audio(clip)
+                try:
+                    for chunk in speech_stream(sentence):
+                        if self.cancelled.is_set():
+                            break
+                        clip.put(chunk)
+                except Exception as e:  # network error, rate-limit timeout, ...: skip the sentence
+                    print("❌ TTS Error:", e)
+                finally:
+                    clip.close()
+        finally:
+            # the player always gets its end marker, however this worker exits
+            self._put_audio(_DONE)
+
+    def _put_audio(self, item):
+        # don't block forever on a full queue once the player has quit
+        while not self.cancelled.is_set():
+            try:
+                self._audio_q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _playback_worker(self):
+        tracing.activate(self._turn)
+        while True:
+            clip = self._audio_q.get()
+            if clip is _DONE or self.cancelled.is_set():
+                return
+            play_pcm(clip)
+
+
+def speak_stream(chunks, max_queued: int = 2) -> str:
+    """Speak a stream of text chunks sentence by sentence; returns the full text."""
+    pipeline = SpeechPipeline(max_queued=max_queued)
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        pipeline.feed(chunk)
+    pipeline.close()
+    return "".join(parts)
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+def frame_rms(frame, scratch) -> float:
+    """
+    RMS of an int16 frame in float32, via a preallocated scratch buffer of at
+    least len(frame) samples (squaring int16 in place would overflow).
+    """
+    x = np.asarray(frame).reshape(-1)
+    if not x.size:
+        return 0.0
+    buf = scratch[:x.size]
+    np.copyto(buf, x, casting="unsafe")
+    return float(np.sqrt(np.dot(buf, buf) / x.size))
+
+
+class VoiceActivityDetector:
+    """
+    Energy VAD with a calibrated noise floor, used for end-of-speech detection.
+    Feed it fixed-size frames; process() returns "start" when speech begins,
+    "end" once speech has been followed by hangover_ms of silence, else None.
+    - calibration_ms: leading audio used to measure the room's noise floor
+    - threshold_ratio: speech must be this many times louder than the floor
+    - min_threshold: absolute RMS floor (int16 scale) so a dead-quiet room still works
+    - min_speech_ms: loud audio needed before it counts as speech (ignores clicks)
+    - hangover_ms: trailing silence that ends the utterance
+    """
+
+    def __init__(self, samplerate: int, frame_ms: int = 30, calibration_ms: int = 300,
+                 threshold_ratio: float = 3.0, min_threshold: float = 200.0,
+                 min_speech_ms: int = 120, hangover_ms: int = 500, noise_adapt: float = 0.05):
+        self.frame_ms = frame_ms
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.noise_adapt = noise_adapt
+
+        self._calib_frames = max(1, calibration_ms // frame_ms)
+        self._speech_frames = max(1, min_speech_ms // frame_ms)
+        self._hangover_frames = max(1, hangover_ms // frame_ms)
+
+        self.noise_floor = None
+        self._calib = []
+        self._scratch = np.empty(self.frame_len, dtype=np.float32)
+        self.in_speech = False
+        self._loud = 0
+        self._quiet = 0
+
+    @property
+    def threshold(self) -> float:
+        if self.noise_floor is None:
+            return float("inf")
+        return max(self.noise_floor * self.threshold_ratio, self.min_threshold)
+
+    @property
+    def silence_ms(self) -> int:
+        """Quiet since the last loud frame of the current utterance (0 outside speech)."""
+        return self._quiet * self.frame_ms if self.in_speech else 0
+
+    def rms(self, frame) -> float:
+        if len(frame) > len(self._scratch):
+            self._scratch = np.empty(len(frame), dtype=np.float32)
+        return frame_rms(frame, self._scratch)
+
+    def process(self, frame):
+        return self.update(self.rms(frame))
+
+    def update(self, level: float):
+        """process() for a frame whose RMS was already measured."""
+
+        # Noise floor calibration on the first few frames
+        if self.noise_floor is None:
+            self._calib.append(level)
+            if len(self._calib) >= self._calib_frames:
+                self.noise_floor = float(np.median(self._calib))
+            return None
+
+        loud = level >= self.threshold
+
+        if not self.in_speech:
+            # Track slow changes in background noise while nobody is talking
+            if not loud:
+                self.noise_floor += self.noise_adapt * (level - self.noise_floor)
+            self._loud = self._loud + 1 if loud else 0
+            if self._loud >= self._speech_frames:
+                self.in_speech = True
+                self._quiet = 0
+                return "start"
+            return None
+
+        self._quiet = 0 if loud else self._quiet + 1
+        if self._quiet >= self._hangover_frames:
+            self.in_speech = False
+            self._loud = 0
+            return "end"
+        return None
+
+    def recalibrate(self):
+        """
+        Leave speech and measure the noise floor again from the next frames,
+        e.g. after an utterance hit its length cap: steady noise that started
+        mid-speech would otherwise keep the detector in speech for good.
+        """
+        self.noise_floor = None
+        self._calib = []
+        self.in_speech = False
+        self._loud = 0
+        self._quiet = 0
+
+
+class SilenceDetector:
+    """
+    listen_microphone's endpointing: a fixed RMS threshold, "start" on the
+    first loud frame and "end" after silence_duration seconds of quiet (also
+    when nobody speaks at all). Same update() protocol as the VAD.
+    """
+
+    def __init__(self, samplerate: int, frame_ms: int = 100, threshold: float = 500.0,
+                 silence_duration: float = 6.0):
+        self.frame_ms = frame_ms
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.threshold = threshold
+        self._limit = max(1, int(silence_duration * 1000 / frame_ms))
+        self.in_speech = False
+        self._quiet = 0
+
+    def update(self, level: float):
+        if level >= self.threshold:
+            self._quiet = 0
+            if not self.in_speech:
+                self.in_speech = True
+                return "start"
+            return None
+        self._quiet += 1
+        if self._quiet >= self._limit:
+            self.in_speech = False
+            self._quiet = 0
+            return "end"
+        return None
@@ -0,0 +1,68 @@
+# bench_graph.py
+# HUD network scaling: graph build (old all-pairs QLineF test vs. KD-tree
+# query_pairs) and per-frame node drift (QPointF loop vs. NumPy), 100..10k nodes.
+#
+#   python -m benchmarks.bench_graph
+
+import math
+import random
+import time
+
+from PyQt6.QtCore import QLineF, QPointF
+
+from HUD.graph import NodeGraph
+
+COUNTS = [100, 300, 1000, 3000, 10000]
+LEGACY_BUILD_MAX = 3000  # all-pairs build is O(n^2); 10k would take minutes
+FRAMES = 100
+
+
+def legacy_build(pos, radius: float):
+    pts = [QPointF(float(x), float(y)) for x, y in pos]
+    edges = []
+    for i in range(len(pts)):
+        for j in range(i + 1, len(pts)):
+            if QLineF(pts[i], pts[j]).length() < radius and random.random() < 0.35:
+                edges.append((i, j))
+    return pts, edges
+
+
+def legacy_frame(pts, phases):
+    for k, p in enumerate(pts):
+        phases[k] += 0.02
+        p.setX(p.x() + math.sin(phases[k]) * 0.15)
+        p.setY(p.y() + math.cos(phases[k] * 0.6) * 0.10)
+
+
+def timed(fn, *args, repeat: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    print(f"{'nodes':>6} {'edges':>7} {'build old ms':>13} {'build new ms':>13} "
+          f"{'frame old ms':>13} {'frame new ms':>13}")
+    for n in COUNTS:
+        t0 = time.perf_counter()
+        g = NodeGraph(n, seed=0)
+        build_new = time.perf_counter() - t0
+        frame_new = timed(g.update, repeat=FRAMES)
+
+        if n <= LEGACY_BUILD_MAX:
+            t0 = time.perf_counter()
+            pts, _ = legacy_build(g.pos, g.link_radius)
+            build_old = f"{(time.perf_counter() - t0) * 1000:13.1f}"
+        else:
+            pts = [QPointF(float(x), float(y)) for x, y in g.pos]
+            build_old = f"{'-':>13}"
+        phases = g.phase.tolist()
+        frame_old = timed(legacy_frame, pts, phases, repeat=FRAMES)
+
+        print(f"{n:>6} {len(g.edges):>7} {build_old} {build_new * 1000:13.1f} "
+              f"{frame_old * 1000:13.3f} {frame_new * 1000:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench_particles.py
+# Per-frame particle update cost: the old list-of-dataclasses loop (QPointF
+# arithmetic per particle) vs. the NumPy ParticleSystem, at several counts.
+#
+#   python -m benchmarks.bench_particles
+
+import math
+import random
+import time
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QPointF
+
+from HUD.particles import ParticleSystem
+
+COUNTS = [100, 300, 1000, 3000, 10000]
+FRAMES = 200
+CENTER = (600.0, 380.0)
+
+
+@dataclass
+class _Particle:
+    pos: QPointF
+    vel: QPointF
+    life: float
+
+
+def _legacy_frame(particles, center, dt=0.016):
+    alive = []
+    for p in particles:
+        p.life -= dt
+        if p.life > 0:
+            to_c = center - p.pos
+            d = math.hypot(to_c.x(), to_c.y()) + 1e-3
+            p.vel += to_c * (0.02 / d)
+            p.pos += p.vel
+            alive.append(p)
+    return alive
+
+
+def bench_legacy(n: int) -> float:
+    center = QPointF(*CENTER)
+    particles = []
+    for _ in range(n):
+        a = random.uniform(0, 2 * math.pi)
+        s = random.uniform(0.8, 2.2)
+        # long life so the population stays at n for the whole run
+        particles.append(_Particle(QPointF(center), QPointF(math.cos(a) * s, math.sin(a) * s), 1e9))
+    t0 = time.perf_counter()
+    for _ in range(FRAMES):
+        particles = _legacy_frame(particles, center)
+    return (time.perf_counter() - t0) / FRAMES
+
+
+def bench_numpy(n: int) -> float:
+    ps = ParticleSystem(capacity=n, seed=0)
+    ps.emit(*CENTER, n, life=(1e9, 1e9 + 1))
+    t0 = time.perf_counter()
+    for _ in range(FRAMES):
+        ps.update(0.016, *CENTER)
+    return (time.perf_counter() - t0) / FRAMES
+
+
+def main():
+    print(f"{'particles':>10} {'legacy ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in COUNTS:
+        legacy = bench_legacy(n)
+        vec = bench_numpy(n)
+        print(f"{n:>10} {legacy * 1000:>10.3f} {vec * 1000:>10.3f} {legacy / vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
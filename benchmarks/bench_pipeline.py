@@ -0,0 +1,184 @@
+# bench_pipeline.py
+# End-to-end voice turns with no keys, network or microphone: recorded (or
+# synthetic) utterances are replayed through a fake sounddevice into
+# listen_microphone -> ask_jessica -> speak_text (or, with --streaming,
+# listen_streaming -> stream_jessica -> SpeechPipeline), against the local
+# Groq / ElevenLabs mocks in mock_servers.py. Reports turns/s, per-step wall
+# time, the tracer's per-stage percentiles and transport connection reuse.
+#
+#   python -m benchmarks.bench_pipeline [--turns 20] [--audio DIR] [--streaming] [--concurrency 4]
+#   python -m benchmarks.bench_pipeline --speed 1 --llm-ttft 0.6    # real-time audio, slow LLM
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_audio, mock_servers
+
+
+def _setup_env(base_url: str, trace_path: str, cache_dir: str):
+    """Must run before the Jessica modules are imported (they read these at import)."""
+    os.environ.update({
+        "ELEVENLABS_API_KEY": "bench",
+        "GROQ_API_KEY": "bench",
+        "ELEVENLABS_API_BASE": base_url,
+        "GROQ_API_BASE": base_url,
+        "JESSICA_TTS_CACHE": cache_dir,
+        "JESSICA_AUDIO_SHM": "",  # in-process meter, no shared memory block
+        "JESSICA_TRACE": trace_path,
+    })
+
+
+def _utterances(audio_dir: str):
+    """[(int16 samples, samplerate)] from a directory of WAVs, or a few synthetic ones."""
+    if audio_dir:
+        paths = sorted(glob.glob(os.path.join(audio_dir, "*.wav")))
+        if not paths:
+            sys.exit(f"❌ No .wav files in {audio_dir}")
+        return [fake_audio.read_wav(p) for p in paths]
+    return [(fake_audio.synth_utterance(seconds=s, seed=i), 16000) for i, s in enumerate((1.2, 2.0, 3.0))]
+
+
+class Steps:
+    """Per-step wall times, shared by the worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.times = {}
+
+    def add(self, step: str, seconds: float):
+        with self._lock:
+            self.times.setdefault(step, []).append(seconds)
+
+    def report(self) -> str:
+        from Core.tracing import percentile
+        lines = [f"{'step':<10} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for step, t in self.times.items():
+            lines.append(f"{step:<10} {len(t):>5} {1000 * percentile(t, 0.5):9.1f} "
+                         f"{1000 * percentile(t, 0.95):9.1f} {1000 * max(t):9.1f}")
+        return "\n".join(lines)
+
+
+def blocking_turn(llm, session: str, steps: Steps, silence: float):
+    from Chatbot.qa import ask_jessica
+    from SpeechRecog.speech_to_text import listen_microphone
+    from SpeechRecog.text_to_speech import speak_text
+
+    t0 = time.perf_counter()
+    text = listen_microphone(samplerate=16000, silence_duration=silence)
+    t1 = time.perf_counter()
+    reply = ask_jessica(llm, text, session=session)
+    t2 = time.perf_counter()
+    speak_text(reply)
+    t3 = time.perf_counter()
+    steps.add("listen", t1 - t0)
+    steps.add("llm", t2 - t1)
+    steps.add("speak", t3 - t2)
+
+
+def streaming_turn(llm, session: str, steps: Steps, silence: float):
+    from Chatbot.qa import stream_jessica
+    from SpeechRecog.speech_to_text import listen_streaming
+    from SpeechRecog.tts_pipeline import SpeechPipeline
+
+    t0 = time.perf_counter()
+    text = listen_streaming(hangover_ms=int(silence * 1000))
+    t1 = time.perf_counter()
+    speech = SpeechPipeline()
+    for token in stream_jessica(llm, text, session=session):
+        speech.feed(token)
+    t2 = time.perf_counter()
+    speech.close()
+    t3 = time.perf_counter()
+    steps.add("listen", t1 - t0)
+    steps.add("llm", t2 - t1)
+    steps.add("speak", t3 - t2)  # only the tail: speech overlaps generation
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=12)
+    ap.add_argument("--concurrency", type=int, default=1, help="independent conversations in parallel")
+    ap.add_argument("--audio", help="directory of 16-bit .wav utterances (default: synthetic)")
+    ap.add_argument("--streaming", action="store_true", help="VAD + streamed LLM + sentence-pipelined TTS")
+    ap.add_argument("--speed", type=float, default=0.0,
+                    help="fake device pacing vs. real time (0 = as fast as possible)")
+    ap.add_argument("--silence", type=float, default=0.6, help="trailing silence that ends an utterance, s")
+    mock_servers.add_arguments(ap)
+    args = ap.parse_args()
+
+    cfg = mock_servers.config_from_args(args)
+    server, base_url = mock_servers.serve_in_thread(cfg)
+    workdir = tempfile.mkdtemp(prefix="jessica-bench-")
+    _setup_env(base_url, os.path.join(workdir, "trace.jsonl"), os.path.join(workdir, "tts"))
+    fake = fake_audio.install(speed=args.speed)
+
+    from Chatbot.build_llm import build_llm
+    from Core.tracing import format_report, tracer
+    from Core.scheduler import scheduler
+    from Core.transport import metrics
+
+    utterances = _utterances(args.audio)
+    for i in range(args.turns):
+        fake.queue_input(*utterances[i % len(utterances)])
+
+    llm = build_llm()
+    steps = Steps()
+    run = streaming_turn if args.streaming else blocking_turn
+    errors = []
+
+    def worker(w: int, turns: int):
+        for _ in range(turns):
+            turn = tracer.begin(worker=w)
+            try:
+                run(llm, f"bench-{w}", steps, args.silence)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                tracer.end(turn)
+
+    per_worker = [args.turns // args.concurrency + (w < args.turns % args.concurrency)
+                  for w in range(args.concurrency)]
+    mode = "streaming" if args.streaming else "blocking"
+    print(f"{args.turns} {mode} turns, concurrency {args.concurrency}, mock at {base_url}")
+
+    # the pipeline narrates every turn; keep the report readable
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(worker, range(args.concurrency), per_worker))
+    wall = time.perf_counter() - t0
+    server.shutdown()
+
+    print(f"\n{args.turns - len(errors)}/{args.turns} turns in {wall:.2f}s "
+          f"({args.turns / wall:.2f} turns/s), audio played {fake.frames_played / 22050:.1f}s")
+    if errors:
+        print(f"❌ {len(errors)} failed, first: {errors[0]!r}")
+    print("\nper step (wall)")
+    print(steps.report())
+    print("\nper stage (tracer)")
+    print(format_report(tracer.summary()))
+
+    snap = metrics.snapshot()
+    print("\ntransport")
+    print(f"  requests     {snap['requests']}  mock saw {dict(cfg.requests)}")
+    print(f"  connections  {snap['connections_opened']}  reuse {snap['connection_reuse'] or 0:.0%}")
+    print("  request ms   " + ", ".join(f"{k} {v:.1f}" for k, v in snap["request_ms_avg"].items()))
+    print("\nscheduler")
+    for name, p in scheduler.snapshot().items():
+        if isinstance(p, dict):
+            print(f"  {name:<12} admitted {p['admitted']}, delayed {p['delayed']}, throttles {p['throttles']}, "
+                  f"wait p95 {p['wait_ms_p95']} ms")
+    print(f"\ntrace: {tracer.path}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# bench_server.py
+# Load test for Core/server.py: starts the server as a subprocess against the
+# Groq mock in mock_servers.py, then runs --clients concurrent clients that
+# each send --requests chat requests (SSE) back to back. Reports requests/s,
+# time to first token and total latency percentiles, and rejections.
+#
+#   python -m benchmarks.bench_server [--clients 16] [--requests 10] [--max-concurrency 8]
+#   python -m benchmarks.bench_server --pipelined 3     # 3 requests per client at once -> 429s
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import mock_servers
+from Core.tracing import percentile
+
+QUESTIONS = ["What are your opening hours?", "Where is the pharmacy?", "Can you tell me a joke?",
+             "How do I get to the station?", "What's the weather like today?"]
+
+
+def _start_server(base_url: str, args) -> tuple:
+    """Core.server in a child process; returns (process, port) once it is listening."""
+    env = dict(os.environ, GROQ_API_KEY="bench", GROQ_API_BASE=base_url, ELEVENLABS_API_KEY="bench",
+               ELEVENLABS_API_BASE=base_url, JESSICA_TTS_CACHE=tempfile.mkdtemp(prefix="jessica-bench-"),
+               JESSICA_AUDIO_SHM="", PYTHONUNBUFFERED="1")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "Core.server", "--port", "0", "--max-concurrency", str(args.max_concurrency),
+         "--per-client", str(args.per_client), "--queue-timeout", str(args.queue_timeout)],
+        env=env, stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if "serving on" in line:
+            return proc, int(line.rsplit(":", 1)[1])
+    sys.exit(f"❌ Server exited with code {proc.wait()}")
+
+
+async def _request(port: int, method: str, path: str, body: dict = None, client: str = "bench"):
+    """One request; returns (status, seconds to first body byte, seconds total, body)."""
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nX-Client-Id: {client}\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    first = None
+    chunks = []
+    while chunk := await reader.read(4096):
+        if first is None:
+            first = time.perf_counter() - t0
+        chunks.append(chunk)
+    writer.close()
+    return status, first, time.perf_counter() - t0, b"".join(chunks)
+
+
+async def _client(port: int, c: int, requests: int, pipelined: int, results: list):
+    async def one(i: int):
+        question = QUESTIONS[(c + i) % len(QUESTIONS)]
+        try:
+            status, first, total, body = await _request(
+                port, "POST", "/chat", {"message": question, "session": f"bench-{c}"}, client=f"client-{c}")
+        except OSError as e:
+            results.append(("error", None, None, repr(e)))
+            return
+        if status == 200 and b"event: done" not in body:
+            status = "error"  # the stream ended without its "done" event
+        results.append((status, first, total, None))
+
+    for i in range(0, requests, pipelined):
+        await asyncio.gather(*(one(i + k) for k in range(min(pipelined, requests - i))))
+
+
+async def _run(port: int, args) -> tuple:
+    results = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(port, c, args.requests, args.pipelined, results) for c in range(args.clients)))
+    wall = time.perf_counter() - t0
+    _, _, _, health = await _request(port, "GET", "/health")
+    return results, wall, json.loads(health)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=10, help="chat requests per client")
+    ap.add_argument("--pipelined", type=int, default=1, help="requests each client has open at once")
+    ap.add_argument("--max-concurrency", type=int, default=8)
+    ap.add_argument("--per-client", type=int, default=2)
+    ap.add_argument("--queue-timeout", type=float, default=10.0)
+    mock_servers.add_arguments(ap)
+    args = ap.parse_args()
+
+    cfg = mock_servers.config_from_args(args)
+    mock, base_url = mock_servers.serve_in_thread(cfg)
+    proc, port = _start_server(base_url, args)
+    try:
+        results, wall, health = asyncio.run(_run(port, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+        mock.shutdown()
+
+    ok = [r for r in results if r[0] == 200]
+    counts = {}
+    for status, *_ in results:
+        counts[status] = counts.get(status, 0) + 1
+    print(f"{len(results)} chat requests from {args.clients} clients "
+          f"(max concurrency {args.max_concurrency}, {args.per_client} per client), mock at {base_url}")
+    print(f"\n{len(ok)} ok in {wall:.2f}s ({len(ok) / wall:.1f} req/s), responses {counts}")
+    if ok:
+        print(f"\n{'':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, values in (("first token", [r[1] for r in ok]), ("total", [r[2] for r in ok])):
+            print(f"{name:<14} " + " ".join(f"{1000 * percentile(values, q):9.1f}" for q in (0.5, 0.95, 0.99)))
+    print("\nserver /health")
+    print(json.dumps({k: health[k] for k in ("requests", "rejected", "errors", "latency", "first_byte", "scheduler")}, indent=2))
+    return 0 if len(ok) == len(results) or args.pipelined > args.per_client else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
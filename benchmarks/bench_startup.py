@@ -0,0 +1,104 @@
+# bench_startup.py
+# Startup guard: `-X importtime` cost of importing the entry points (must stay
+# free of heavy imports and side effects) and wall time until the assistant is
+# ready (LLM client built). Exits non-zero when a budget is exceeded.
+#
+#   python -m benchmarks.bench_startup [--main-budget-ms 50] [--ready-budget-ms 2500]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must import without keys, network, audio devices or heavy deps
+ENTRY_MODULES = [
+    "main",
+    "Chatbot.qa",
+    "Core.orchestrator",
+    "SpeechRecog.speech_to_text",
+    "SpeechRecog.text_to_speech",
+    "SpeechRecog.tts_pipeline",
+]
+
+READY_SNIPPET = "import main; from Chatbot.build_llm import build_llm; build_llm()"
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.pop("ELEVENLABS_API_KEY", None)  # importing must not need it
+    env.setdefault("GROQ_API_KEY", "bench-dummy-key")  # the client is built, never called
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_profile(module: str):
+    """(cumulative ms of module, [(cumulative ms, name)] of its direct imports) from -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    children = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000
+        # children are printed before their parent
+        if depth == 1:
+            children.append((ms, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                return ms, children
+            children = []
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def ready_time(repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", READY_SNIPPET], cwd=ROOT, env=_env(), check=True)
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--main-budget-ms", type=float, default=50.0,
+                    help="import main: must not pull in anything heavy")
+    ap.add_argument("--module-budget-ms", type=float, default=800.0,
+                    help="other entry modules (NumPy, requests, langchain-core are allowed)")
+    ap.add_argument("--ready-budget-ms", type=float, default=2500.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--top", type=int, default=5)
+    args = ap.parse_args()
+
+    failed = False
+    print(f"{'module':<30} {'import ms':>10}  heaviest direct imports (ms)")
+    for module in ENTRY_MODULES:
+        totals, top = [], []
+        for _ in range(args.repeat):
+            total, top = import_profile(module)
+            totals.append(total)
+        total = statistics.median(totals)
+        heavy = ", ".join(f"{name} {ms:.0f}" for ms, name in sorted(top, reverse=True)[:args.top])
+        budget = args.main_budget_ms if module == "main" else args.module_budget_ms
+        mark = "" if total <= budget else f"  <-- over budget ({budget:.0f} ms)"
+        failed |= bool(mark)
+        print(f"{module:<30} {total:10.1f}  {heavy}{mark}")
+
+    ready = ready_time(args.repeat)
+    mark = "" if ready <= args.ready_budget_ms else "  <-- over budget"
+    failed |= bool(mark)
+    print(f"\nready (process start -> LLM client built): {ready:.0f} ms "
+          f"(budget {args.ready_budget_ms:.0f} ms){mark}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
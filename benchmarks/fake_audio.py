@@ -0,0 +1,205 @@
+# fake_audio.py
+# File-backed stand-in for the sounddevice module: InputStream "records" a
+# WAV file (then background hiss), via read() or a callback thread;
+# OutputStream swallows what is played. install()
+# puts it in sys.modules, which works because the speech modules import
+# sounddevice lazily.
+#
+#   fake = fake_audio.install(speed=0)   # 0 = as fast as possible, 1 = real time
+#   fake.queue_input("utterance.wav")
+
+import sys
+import threading
+import time
+import types
+import wave
+from collections import deque
+
+import numpy as np
+
+
+def read_wav(path: str):
+    """(int16 mono samples, samplerate) of a 16-bit WAV file."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV is supported")
+        data = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        return data.reshape(-1, w.getnchannels())[:, 0].copy(), w.getframerate()
+
+
+def write_wav(path: str, samples: np.ndarray, samplerate: int):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(samplerate)
+        w.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+class CallbackStop(Exception):
+    pass
+
+
+class CallbackAbort(Exception):
+    pass
+
+
+class FakeAudio(types.ModuleType):
+    """
+    - speed: pacing relative to real time for reads and writes (0 = don't sleep)
+    - noise: RMS of the background hiss returned once the input file runs out
+    """
+
+    CallbackStop = CallbackStop
+    CallbackAbort = CallbackAbort
+
+    def __init__(self, speed: float = 0.0, noise: float = 30.0, seed: int = 0):
+        super().__init__("sounddevice")
+        self.speed = speed
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self._inputs = deque()
+        self._lock = threading.Lock()
+        self.frames_played = 0
+        self.streams_opened = 0
+
+        fake = self
+
+        class InputStream:
+            def __init__(self, samplerate=44100, channels=1, dtype="int16", blocksize=0, callback=None, **kw):
+                self.samplerate = samplerate
+                self.channels = channels
+                self.blocksize = blocksize or 1024
+                self.callback = callback
+                self._data = fake._next_input(samplerate)
+                self._pos = 0
+                self._running = False
+                self._thread = None
+
+            def start(self):
+                if self.callback is not None and not self._running:
+                    self._running = True
+                    self._thread = threading.Thread(target=self._pump, daemon=True)
+                    self._thread.start()
+
+            def stop(self):
+                self._running = False
+                if self._thread is not None and self._thread is not threading.current_thread():
+                    self._thread.join()
+                self._thread = None
+
+            abort = stop
+
+            def close(self):
+                self.stop()
+
+            def __enter__(self):
+                self.start()
+                return self
+
+            def __exit__(self, *exc):
+                self.close()
+                return False
+
+            def _block(self, frames: int):
+                out = (fake.rng.standard_normal((frames, self.channels)) * fake.noise).astype(np.int16)
+                chunk = self._data[self._pos:self._pos + frames]
+                out[:len(chunk), 0] = chunk
+                self._pos += frames
+                return out
+
+            def read(self, frames: int):
+                out = self._block(frames)
+                fake._pace(frames, self.samplerate)
+                return out, False
+
+            def _pump(self):
+                # a real device clocks the callback, so even speed=0 paces it (at 50x)
+                # instead of spinning on background hiss
+                period = self.blocksize / self.samplerate / (fake.speed or 50.0)
+                while self._running:
+                    try:
+                        self.callback(self._block(self.blocksize), self.blocksize, None, 0)
+                    except (CallbackStop, CallbackAbort):
+                        break
+                    time.sleep(period)
+
+        class OutputStream:
+            def __init__(self, samplerate=44100, channels=1, dtype="int16", **kw):
+                self.samplerate = samplerate
+                with fake._lock:
+                    fake.streams_opened += 1
+
+            def start(self):
+                pass
+
+            def write(self, data):
+                with fake._lock:
+                    fake.frames_played += len(data)
+                fake._pace(len(data), self.samplerate)
+
+            def stop(self):
+                pass
+
+            abort = close = stop
+
+            def __enter__(self):
+                self.start()
+                return self
+
+            def __exit__(self, *exc):
+                self.close()
+                return False
+
+        self.InputStream = InputStream
+        self.OutputStream = OutputStream
+
+    def queue_input(self, source, samplerate: int = None):
+        """Next InputStream records this WAV path (or int16 array at samplerate)."""
+        if isinstance(source, str):
+            source, samplerate = read_wav(source)
+        with self._lock:
+            self._inputs.append((np.asarray(source, dtype=np.int16), samplerate))
+
+    def _next_input(self, samplerate: int) -> np.ndarray:
+        with self._lock:
+            if not self._inputs:
+                return np.zeros(0, dtype=np.int16)
+            data, rate = self._inputs.popleft()
+        if rate and rate != samplerate:  # linear resample is plenty for a fake mic
+            n = int(len(data) * samplerate / rate)
+            data = np.interp(np.linspace(0, len(data) - 1, n), np.arange(len(data)), data).astype(np.int16)
+        return data
+
+    def _pace(self, frames: int, samplerate: int):
+        if self.speed > 0:
+            time.sleep(frames / samplerate / self.speed)
+
+    # sd.play / sd.stop / sd.wait, for code that still uses them
+    def play(self, data, samplerate):
+        with self._lock:
+            self.frames_played += len(data)
+
+    def stop(self):
+        pass
+
+    def wait(self):
+        pass
+
+
+def install(speed: float = 0.0, noise: float = 30.0) -> FakeAudio:
+    fake = FakeAudio(speed=speed, noise=noise)
+    sys.modules["sounddevice"] = fake
+    return fake
+
+
+def synth_utterance(seconds: float = 1.5, samplerate: int = 16000, lead: float = 0.3, seed: int = 0) -> np.ndarray:
+    """Voice-like test signal: a short silence, then syllable-shaped bursts of a harmonic tone."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / samplerate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 3.5 * t), 0.15, None)
+    signal = 6000 * voice * envelope + rng.standard_normal(len(t)) * 200
+    lead_in = np.zeros(int(lead * samplerate))
+    return np.concatenate([lead_in, signal]).clip(-32768, 32767).astype(np.int16)
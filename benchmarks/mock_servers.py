@@ -0,0 +1,226 @@
+"""
+Local stand-ins for ElevenLabs (speech-to-text, streaming text-to-speech) and
+Groq (chat completions, plain and SSE-streamed) with configurable latency, so
+the whole pipeline runs offline. Point the clients at it with
+
+    ELEVENLABS_API_BASE=http://127.0.0.1:8766  GROQ_API_BASE=http://127.0.0.1:8766
+
+    python -m benchmarks.mock_servers --port 8766 --llm-ttft 0.3 --tts-ttfb 0.15
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from SpeechRecog.local_stt_server import _read_body
+
+
+@dataclass
+class MockConfig:
+    stt_latency: float = 0.25      # s from end of upload to transcript
+    stt_text: str = "what's the weather like today"
+    llm_ttft: float = 0.30         # s until the first token
+    llm_token_ms: float = 15.0     # between streamed tokens
+    llm_reply: str = "Looks sunny out there. Grab your sunglasses and enjoy it."
+    llm_unique: bool = True        # number each reply so the TTS cache can't short-circuit synthesis
+    llm_rpm: float = 0.0           # Groq-style requests/min quota (x-ratelimit-* headers, 429s); 0 = none
+    tts_ttfb: float = 0.15         # s until the first audio byte
+    tts_realtime: float = 4.0      # audio is streamed this many times faster than it plays
+    tts_ms_per_char: float = 65.0  # roughly conversational speaking rate
+    tts_rate: int = 22050
+    tts_chunk: int = 4096          # bytes per chunk
+    requests: Counter = field(default_factory=Counter)
+
+
+def _tone(n: int, rate: int) -> bytes:
+    """n samples of a warbling tone as int16 PCM (cheap, deterministic 'speech')."""
+    out = bytearray(2 * n)
+    for i in range(n):
+        t = i / rate
+        v = int(9000 * math.sin(2 * math.pi * (180 + 40 * math.sin(6 * t)) * t))
+        out[2 * i:2 * i + 2] = v.to_bytes(2, "little", signed=True)
+    return bytes(out)
+
+
+def make_handler(cfg: MockConfig):
+    tone = _tone(cfg.tts_rate, cfg.tts_rate)  # 1 s, repeated as needed
+    quota = {"level": cfg.llm_rpm, "t": time.monotonic()}  # requests left, replenished continuously
+    quota_lock = threading.Lock()
+
+    def llm_quota():
+        """(admitted, headers) under cfg.llm_rpm, with Groq's header semantics."""
+        if not cfg.llm_rpm:
+            return True, {}
+        per_s = cfg.llm_rpm / 60
+        with quota_lock:
+            now = time.monotonic()
+            quota["level"] = min(cfg.llm_rpm, quota["level"] + (now - quota["t"]) * per_s)
+            quota["t"] = now
+            admitted = quota["level"] >= 1
+            if admitted:
+                quota["level"] -= 1
+            remaining = int(quota["level"])
+            headers = {"x-ratelimit-limit-requests": f"{cfg.llm_rpm:g}",
+                       "x-ratelimit-remaining-requests": str(remaining),
+                       # until the quota is full again
+                       "x-ratelimit-reset-requests": f"{(cfg.llm_rpm - quota['level']) / per_s:.2f}s"}
+            if not admitted:
+                headers["retry-after"] = str(math.ceil((1 - quota["level"]) / per_s))
+            return admitted, headers
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        _extra = {}  # per-response headers (rate limits)
+
+        def handle(self):
+            try:
+                super().handle()
+            except ConnectionResetError:
+                pass  # a pooled keep-alive connection closed by the client
+
+        def do_POST(self):
+            try:
+                self._route(urlparse(self.path).path, _read_body(self))
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # the client gave up (e.g. a failover deadline)
+
+        def _route(self, path: str, body: bytes):
+            if path.endswith("/speech-to-text"):
+                cfg.requests["stt"] += 1
+                self._stt()
+            elif "/text-to-speech/" in path:
+                cfg.requests["tts"] += 1
+                self._tts(json.loads(body)["text"])
+            elif path.endswith("/chat/completions"):
+                admitted, self._extra = llm_quota()
+                if not admitted:
+                    cfg.requests["llm_429"] += 1
+                    self._json(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                               "code": "rate_limit_exceeded"}})
+                    return
+                cfg.requests["llm"] += 1
+                self._chat(json.loads(body))
+            else:
+                self._json(404, {"detail": f"no mock for {path}"})
+
+        # ---------- Endpoints ----------
+
+        def _stt(self):
+            time.sleep(cfg.stt_latency)
+            self._json(200, {"text": cfg.stt_text})
+
+        def _tts(self, text: str):
+            n_bytes = 2 * int(len(text) * cfg.tts_ms_per_char / 1000 * cfg.tts_rate)
+            pcm = (tone * (n_bytes // len(tone) + 1))[:n_bytes]
+            chunk_s = cfg.tts_chunk / 2 / cfg.tts_rate / cfg.tts_realtime
+            time.sleep(cfg.tts_ttfb)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/pcm")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(pcm), cfg.tts_chunk):
+                self._chunk(pcm[i:i + cfg.tts_chunk])
+                time.sleep(chunk_s)
+            self._chunk(b"")
+
+        def _chat(self, req: dict):
+            model = req.get("model", "mock")
+            reply = cfg.llm_reply
+            if cfg.llm_unique:
+                reply += f" That was number {cfg.requests['llm']}."
+            tokens = [w + " " for w in reply.split()]
+            usage = {"prompt_tokens": sum(len(m.get("content") or "") for m in req.get("messages", [])) // 4,
+                     "completion_tokens": len(tokens)}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            time.sleep(cfg.llm_ttft)
+            if not req.get("stream"):
+                time.sleep(len(tokens) * cfg.llm_token_ms / 1000)
+                self._json(200, {
+                    "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "".join(tokens)}}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self._send_extra()
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, tok in enumerate(tokens):
+                if i:
+                    time.sleep(cfg.llm_token_ms / 1000)
+                self._event({"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [{"index": 0, "finish_reason": None,
+                                                          "delta": {"role": "assistant", "content": tok}}]})
+            self._event({"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                         "x_groq": {"usage": usage}})
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+
+        # ---------- Helpers ----------
+
+        def _json(self, status: int, obj: dict):
+            payload = json.dumps(obj).encode()
+            self.send_response(status)
+            self._send_extra()
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_extra(self):
+            for name, value in self._extra.items():
+                self.send_header(name, value)
+            self._extra = {}
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _event(self, obj: dict):
+            self._chunk(b"data: " + json.dumps(obj).encode() + b"\n\n")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve_in_thread(cfg: MockConfig = None, port: int = 0):
+    """Start the mock on a daemon thread; returns (server, base url)."""
+    cfg = cfg or MockConfig()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def add_arguments(ap: argparse.ArgumentParser):
+    """--stt-latency, --llm-ttft, ... for every MockConfig knob."""
+    defaults = MockConfig()
+    for name in ("stt_latency", "llm_ttft", "llm_token_ms", "llm_rpm", "tts_ttfb", "tts_realtime", "tts_ms_per_char"):
+        ap.add_argument("--" + name.replace("_", "-"), type=float, default=getattr(defaults, name))
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(stt_latency=args.stt_latency, llm_ttft=args.llm_ttft, llm_token_ms=args.llm_token_ms,
+                      llm_rpm=args.llm_rpm, tts_ttfb=args.tts_ttfb, tts_realtime=args.tts_realtime,
+                      tts_ms_per_char=args.tts_ms_per_char)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8766)
+    add_arguments(ap)
+    args = ap.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(config_from_args(args)))
+    print(f"Mock ElevenLabs + Groq on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -4,16 +4,17 @@
 # animated network nodes/edges, particle trails, and live data overlays.
 
 import math
+import os
 import random
 import sys
-from dataclasses import dataclass
-from typing import List, Tuple
+import time
 
+import numpy as np
 from PyQt6.QtCore import (
     QEasingCurve,
+    QLineF,
     QPointF,
     QRectF,
-    QLineF,
     QPropertyAnimation,
     QParallelAnimationGroup,
     QTimer,
@@ -40,7 +41,21 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from Core.audio_levels import BANDS, attach
+from HUD.frame_stats import FrameStats, QualityGovernor
+from HUD.graph import NodeGraph
+from HUD.particles import ParticleSystem
+from HUD.render_cache import BackgroundLayer, SpriteBatch, SpriteCache
+
 BACKGROUND_PATH = "image.jpg"  # change if needed
+MAX_PARTICLES = 2048
+NODE_COUNT = int(os.getenv("HUD_NODES", "50"))  # raise for dense networks on large displays
+EDGE_DASH_BUCKETS = 32  # edges are drawn in batches sharing a quantized dash offset
+FRAME_BUDGET_MS = 1000 / 60
+FRAME_STATS_PATH = os.getenv("HUD_FRAME_STATS", os.path.join(os.path.expanduser("~"), ".cache", "jessica",
+                                                              "hud_frame_stats.json"))
+AUDIO_ATTACH_EVERY = 2.0  # s between attempts to find the assistant's audio levels
+AUDIO_ATTACK, AUDIO_RELEASE = 0.6, 0.12  # per-frame smoothing of bars / level
 
 # ---------- Utility ----------
 
@@ -53,30 +68,6 @@ def pulse(ticks: int, period_ms: int, min_v: float, max_v: float) -> float:
     x = 2 * phase if phase <= 0.5 else 2 * (1 - phase)
     return lerp(min_v, max_v, x)
 
-# ---------- Data classes ----------
-
-@dataclass
-class Node:
-    pos: QPointF
-    phase: float
-    radius: float
-    color: QColor
-
-@dataclass
-class Edge:
-    a: int
-    b: int
-    dash_offset: float
-    color: QColor
-
-@dataclass
-class Particle:
-    pos: QPointF
-    vel: QPointF
-    life: float
-    max_life: float
-    hue: float
-
 # ---------- Main HUD Widget ----------
 
 class JarvisHUD(QWidget):
@@ -84,17 +75,36 @@ class JarvisHUD(QWidget):
         super().__init__(parent)
         self.setMouseTracking(True)
         self.bg = QPixmap(BACKGROUND_PATH)
+        self.background = BackgroundLayer(self.bg)
+        self.sprites = SpriteCache()
+        self.batch = SpriteBatch()
+        self._edge_pen = QPen(QColor(0, 255, 255, 140), 1.4)
+        self._edge_pen.setDashPattern([6, 10])
         self.ticks = 0
         self.setMinimumSize(1100, 650)
 
         # Nodes and edges
         random.seed(7)
-        self.nodes: List[Node] = []
-        self.edges: List[Edge] = []
-        self._init_graph()
-
-        # Particles
-        self.particles: List[Particle] = []
+        self.graph = NodeGraph(NODE_COUNT, seed=7)
+
+        # Particles (NumPy structure-of-arrays, hard-capped)
+        self.particles = ParticleSystem(MAX_PARTICLES, seed=7)
+
+        # Frame instrumentation and adaptive quality
+        self.frame_stats = FrameStats(FRAME_BUDGET_MS)
+        self.governor = QualityGovernor(FRAME_BUDGET_MS)
+        self._last_tick = None
+        self._tick_ms = 0.0
+        self._interval_ms = FRAME_BUDGET_MS
+        self._frame_pending = False
+        self._perf_text = []
+
+        # Live audio levels published by the assistant (mic + Jessica's voice)
+        self.audio = None
+        self._audio_retry = 0.0
+        self.level = 0.0  # smoothed RMS-based loudness 0..1
+        self.bars = np.zeros(BANDS, dtype=np.float32)
+        self._audio_active = False
 
         # Animation timer (60 FPS target)
         self.timer = QTimer(self)
@@ -112,25 +122,6 @@ class JarvisHUD(QWidget):
 
     # ---------- Initialization ----------
 
-    def _init_graph(self):
-        w, h = 1200, 700
-        # Place nodes in bands to resemble a hemispherical grid
-        for band in range(5):
-            y = 260 + band * 70
-            count = 6 + band * 2
-            for i in range(count):
-                x = 150 + i * (800 / max(1, count - 1)) + random.uniform(-20, 20)
-                r = random.uniform(3, 6)
-                hue = random.randint(180, 200)  # cyan-blue
-                self.nodes.append(
-                    Node(QPointF(x, y + random.uniform(-10, 10)), random.random(), r, QColor.fromHsl(hue, 255, 180))
-                )
-        # Connect near neighbors
-        for i in range(len(self.nodes)):
-            for j in range(i + 1, len(self.nodes)):
-                if QLineF(self.nodes[i].pos, self.nodes[j].pos).length() < 180 and random.random() < 0.35:
-                    self.edges.append(Edge(i, j, random.uniform(0, 100), QColor(0, 255, 255, 140)))
-
     def _fade_in(self):
         eff = QGraphicsOpacityEffect(self)
         self.setGraphicsEffect(eff)
@@ -144,123 +135,150 @@ class JarvisHUD(QWidget):
     # ---------- Animation update ----------
 
     def _emit_particles(self, center: QPointF, count: int = 8):
-        for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(0.8, 2.2)
-            vel = QPointF(math.cos(angle) * speed, math.sin(angle) * speed)
-            life = random.uniform(0.8, 1.6)
-            hue = random.uniform(180, 195)
-            self.particles.append(Particle(center, vel, life, life, hue))
+        self.particles.emit(center.x(), center.y(), count)
+
+    def _read_audio(self, now: float):
+        # Lock-free read of the newest block from each source; never blocks the event loop
+        if self.audio is None:
+            if now < self._audio_retry:
+                return
+            self._audio_retry = now + AUDIO_ATTACH_EVERY
+            self.audio = attach()
+            if self.audio is None:
+                return
+
+        rms, bands = 0.0, None
+        for ring in (self.audio.mic, self.audio.playback):
+            got = ring.latest()
+            if got is not None and got[0] >= rms:
+                rms, bands = got
+        self._audio_active = bands is not None
+        if self._audio_active:
+            self._audio_retry = now + AUDIO_ATTACH_EVERY
+        elif now > self._audio_retry + 3 * AUDIO_ATTACH_EVERY:
+            # publisher gone quiet for a while: it may have restarted with a new block
+            self.audio.close()
+            self.audio = None
+        if bands is None:
+            bands = np.zeros(BANDS, dtype=np.float32)
+        level = min(1.0, rms * 6.0)  # speech RMS sits around 0.02..0.15 of full scale
+
+        # fast attack, slow release
+        rate = np.where(bands > self.bars, AUDIO_ATTACK, AUDIO_RELEASE)
+        self.bars += (bands - self.bars) * rate
+        self.level += (level - self.level) * (AUDIO_ATTACK if level > self.level else AUDIO_RELEASE)
 
     def _tick(self):
-        self.ticks += 16
-
-        # Slight node drift and blinking
-        for n in self.nodes:
-            n.phase += 0.02
-            n.pos.setX(n.pos.x() + math.sin(n.phase) * 0.15)
-            n.pos.setY(n.pos.y() + math.cos(n.phase * 0.6) * 0.10)
-
-        # Animate dashed offsets for edges (gives moving pulses)
-        for e in self.edges:
-            e.dash_offset = (e.dash_offset + 1.6) % 100.0
-
-        # Spawn particles near the center emitter
+        start = time.perf_counter()
+        # Real elapsed time since the previous frame (clamped after stalls)
+        elapsed = start - self._last_tick if self._last_tick is not None else FRAME_BUDGET_MS / 1000
+        self._last_tick = start
+        self._interval_ms = elapsed * 1000
+        dt = min(elapsed, 0.1)
+        self.ticks += int(dt * 1000)
+        self._read_audio(start)
+
+        # Slight node drift and dashed-offset animation (gives moving pulses)
+        self.graph.update(dt / 0.016)
+
+        # Spawn particles near the center emitter (louder audio -> more,
+        # scaled down by the quality level)
         center = QPointF(self.width() / 2, self.height() / 2 + 30)
-        if random.random() < 0.6:
-            self._emit_particles(center, count=random.randint(3, 6))
-
-        # Update particles
-        dt = 0.016
-        alive: List[Particle] = []
-        for p in self.particles:
-            p.life -= dt
-            if p.life > 0:
-                # Curving motion toward center (attractor)
-                to_c = center - p.pos
-                d = math.hypot(to_c.x(), to_c.y()) + 1e-3
-                acc = to_c * (0.02 / d)
-                p.vel += acc
-                p.pos += p.vel
-                alive.append(p)
-        self.particles = alive
+        if random.random() < 0.6 + 0.4 * self.level:
+            count = random.randint(3, 6) * (1 + 3 * self.level) * self.governor.emission * (dt / 0.016)
+            self._emit_particles(center, count=max(1, round(count)))
 
+        # Update particles (curving motion toward center attractor)
+        self.particles.update(dt, center.x(), center.y())
+
+        self._tick_ms = (time.perf_counter() - start) * 1000
+        self._frame_pending = True
         self.update()
 
+    def _end_frame(self, paint_ms: float):
+        if not self._frame_pending:
+            return  # repaint without a tick (resize, expose)
+        self._frame_pending = False
+        self.frame_stats.record(self._tick_ms, paint_ms, self._interval_ms)
+        self.governor.update(self._tick_ms + paint_ms)
+
+        if self.frame_stats.frames % 30 == 0:
+            pct = self.frame_stats.percentiles()
+            self._perf_text = [
+                f"FPS {self.frame_stats.fps():4.1f}",
+                f"FRAME p50/p95/p99 {pct['work']['p50']:.1f}/{pct['work']['p95']:.1f}/{pct['work']['p99']:.1f} ms",
+                f"DROPPED {self.frame_stats.dropped}",
+                f"Q{self.governor.level}",
+            ]
+
+    def export_frame_stats(self, path: str = FRAME_STATS_PATH):
+        self.frame_stats.export(path, {"quality_level": self.governor.level,
+                                       "particles": self.particles.count,
+                                       "nodes": self.graph.count})
+        return path
+
     # ---------- Drawing ----------
 
+    def resizeEvent(self, ev):
+        self.background.invalidate()
+        super().resizeEvent(ev)
+
     def paintEvent(self, ev):
+        paint_start = time.perf_counter()
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
-
-        # Background
-        if not self.bg.isNull():
-            painter.drawPixmap(self.rect(), self.bg)  # fit background
-        else:
-            painter.fillRect(self.rect(), QColor(8, 12, 22))
-
-        # Dim vignette
-        vg = QRadialGradient(QPointF(self.width() / 2, self.height() / 2), max(self.width(), self.height()) * 0.75)
-        vg.setColorAt(0.0, QColor(0, 0, 0, 0))
-        vg.setColorAt(1.0, QColor(0, 0, 0, 160))
-        painter.fillRect(self.rect(), vg)
-
-        # Network edges
-        for e in self.edges:
-            a = self.nodes[e.a].pos
-            b = self.nodes[e.b].pos
-            pen = QPen(e.color, 1.4)
-            pen.setDashPattern([6, 10])
-            pen.setDashOffset(e.dash_offset)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, self.governor.antialias)
+        glow = self.governor.glow
+
+        # Background + vignette (cached layer, re-rendered only on resize)
+        painter.drawPixmap(0, 0, self.background.pixmap(self.width(), self.height()))
+
+        sprites = self.sprites
+        batch = self.batch
+
+        # Network edges: one drawLines call per quantized dash offset
+        g = self.graph
+        pen = self._edge_pen
+        ends_a = g.pos[g.edges[:, 0]]
+        ends_b = g.pos[g.edges[:, 1]]
+        bucket = (g.dash_offset * (EDGE_DASH_BUCKETS / 100.0)).astype(np.int32)
+        for k in np.unique(bucket).tolist():
+            sel = np.flatnonzero(bucket == k)
+            pen.setDashOffset(k * 100.0 / EDGE_DASH_BUCKETS)
             painter.setPen(pen)
-            painter.drawLine(a, b)
-
-            # traveling light along edge
-            t = ((self.ticks * 0.12 + e.dash_offset) % 100) / 100.0
-            pt = QPointF(lerp(a.x(), b.x(), t), lerp(a.y(), b.y(), t))
-            rg = QRadialGradient(pt, 10)
-            c = QColor(120, 255, 255, 180)
-            rg.setColorAt(0.0, c)
-            rg.setColorAt(1.0, QColor(120, 255, 255, 0))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.setBrush(rg)
-            painter.drawEllipse(pt, 8, 8)
-
-        # Nodes (with glow using radial gradient)
-        for n in self.nodes:
-            glow_r = n.radius * 6
-            rg = QRadialGradient(n.pos, glow_r)
-            base = QColor(0, 255, 255, 180)
-            base.setHsl(n.color.hslHue(), 255, 160, 180)
-            rg.setColorAt(0.0, base)
-            rg.setColorAt(1.0, QColor(base.red(), base.green(), base.blue(), 0))
-            painter.setBrush(rg)
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawEllipse(n.pos, glow_r, glow_r)
-
-            # core
-            blink = 0.6 + 0.4 * math.sin(self.ticks * 0.01 + n.phase * 6.28)
-            core = QColor(200, 255, 255, int(220 * blink))
-            painter.setBrush(core)
-            painter.setPen(QPen(QColor(170, 255, 255, 200), 1))
-            painter.drawEllipse(n.pos, n.radius + 1.0, n.radius + 1.0)
-
-        # Particle system (simple additive glow)
-        for p in self.particles:
-            alpha = int(255 * (p.life / p.max_life))
-            col = QColor.fromHsl(int(p.hue), 255, 200, alpha)
-            rg = QRadialGradient(p.pos, 12)
-            rg.setColorAt(0.0, col)
-            rg.setColorAt(1.0, QColor(col.red(), col.green(), col.blue(), 0))
-            painter.setBrush(rg)
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawEllipse(p.pos, 12, 12)
+            painter.drawLines([QLineF(*ends_a[i], *ends_b[i]) for i in sel.tolist()])
+
+        # traveling light along each edge
+        light = sprites.glow(10, 180, 180, lightness=188)
+        t = (((self.ticks * 0.12 + g.dash_offset) % 100) / 100.0)[:, None]
+        for x, y in (ends_a + (ends_b - ends_a) * t).tolist():
+            batch.add(light, x, y)
+        batch.flush(painter)
+
+        # Nodes: glow sprites, then cores blinking via blit opacity
+        blink = 0.6 + 0.4 * np.sin(self.ticks * 0.01 + g.phase * 6.28)
+        nodes = list(zip(g.pos.tolist(), g.radius.tolist(), g.hue.tolist(), blink.tolist()))
+        for (x, y), r, hue, _ in nodes:
+            batch.add(sprites.glow(r * 6 * glow, hue, 180), x, y)
+        batch.flush(painter)
+        for (x, y), r, _, b in nodes:
+            batch.add(sprites.core(r + 1.0), x, y, b)
+        batch.flush(painter)
+
+        # Particle system (simple additive glow, fading with remaining life)
+        ps = self.particles
+        live = ps.live()
+        fade = ps.life[live] / ps.max_life[live]
+        for i, opacity in zip(live.tolist(), fade.tolist()):
+            batch.add(sprites.glow(12 * glow, ps.hue[i], 255, lightness=200), ps.pos[i, 0], ps.pos[i, 1], opacity)
+        batch.flush(painter)
 
         # Central AI face and pulsing eyes
         self._draw_ai_face(painter)
 
         # Data overlays
         self._draw_hud_text(painter)
+        painter.end()
+        self._end_frame((time.perf_counter() - paint_start) * 1000)
 
     def _draw_ai_face(self, painter: QPainter):
         cx, cy = self.width() / 2, self.height() / 2 - 20
@@ -297,8 +315,11 @@ class JarvisHUD(QWidget):
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawEllipse(center, 34, 34)
 
-            # iris core with pulse
-            pulse_a = pulse(self.ticks, 1200, 0.55, 1.0)
+            # iris core: follows the voice while there is audio, idle pulse otherwise
+            if self._audio_active:
+                pulse_a = lerp(0.55, 1.0, self.level)
+            else:
+                pulse_a = pulse(self.ticks, 1200, 0.55, 1.0)
             iris = QColor(180, 255, 255, int(255 * pulse_a))
             painter.setBrush(iris)
             painter.setPen(QPen(QColor(200, 255, 255, 220), 1.2))
@@ -345,22 +366,24 @@ class JarvisHUD(QWidget):
         uptime = self.uptime_ms // 1000
         msgs = [
             f"UPTIME: {uptime:05d}s",
-            f"NODES: {len(self.nodes)}",
-            f"EDGES: {len(self.edges)}",
-            f"PARTICLES: {len(self.particles)}",
-            f"FPS ~ 60",
+            f"NODES: {self.graph.count}",
+            f"EDGES: {len(self.graph.edges)}",
+            f"PARTICLES: {self.particles.count}",
         ]
-        x = 30
-        for m in msgs:
-            painter.drawText(x, self.height() - 30, m)
-            x += painter.fontMetrics().horizontalAdvance(m + "    ")
-
-        # Mini bar charts
+        # measured frame timing on its own row below
+        for row, line in ((30, msgs), (12, self._perf_text)):
+            x = 30
+            for m in line:
+                painter.drawText(x, self.height() - row, m)
+                x += painter.fontMetrics().horizontalAdvance(m + "    ")
+
+        # Mini bar chart: FFT band energies of the live audio (idle wave when silent)
         base_y = self.height() - 60
         base_x = 30
         painter.setPen(Qt.PenStyle.NoPen)
-        for i in range(24):
-            h = 6 + 26 * (0.3 + 0.7 * random.random())
+        for i, band in enumerate(self.bars.tolist()):
+            idle = 0.15 + 0.1 * math.sin(self.ticks * 0.004 + i * 0.5)
+            h = 6 + 26 * max(band, idle)
             alpha = 120 + int(100 * math.sin((self.ticks * 0.01 + i) * 0.2))
             painter.setBrush(QColor(120, 255, 255, alpha))
             painter.drawRect(int(base_x + i * 10), int(base_y - h), int(6), int(h))
@@ -382,8 +405,13 @@ class MainWindow(QMainWindow):
         toggle.triggered.connect(self.toggle_particles)
         self.menuBar().addAction(toggle)
 
+        export = QAction("Export Frame Stats", self)
+        export.triggered.connect(lambda: print("Frame stats written to", self.hud.export_frame_stats()))
+        self.menuBar().addAction(export)
+
     def toggle_particles(self, checked: bool):
         if checked and not self.hud.timer.isActive():
+            self.hud._last_tick = None  # the paused time isn't a dropped frame
             self.hud.timer.start(16)
         elif not checked and self.hud.timer.isActive():
             self.hud.timer.stop()
@@ -1,27 +1,99 @@
 
-from Chatbot.build_llm import build_llm
-from Chatbot.qa import ask_jessica
-from SpeechRecog.speech_to_text import listen_microphone
-from SpeechRecog.text_to_speech import speak_text
+import sys
+import threading
+import time
 import warnings
 
+# Heavy modules (LangChain, SciPy, sounddevice, ...) are imported inside the
+# functions below, so `import main` is cheap and nothing runs until main().
+
+_t0 = time.perf_counter()
+
+
+def _preload():
+    """Import what the first turn needs (resampler, encoder) in the background."""
+    import scipy.signal  # noqa: F401
+    import soundfile  # noqa: F401
+
+
+def _ready():
+    print(f"Ready in {time.perf_counter() - _t0:.2f}s")
+
+
 def build_assistant():
+    from Chatbot.build_llm import build_llm
+    from Chatbot.qa import stream_jessica
+    from Core.tracing import format_report, tracer
+    from SpeechRecog.speech_to_text import listen_streaming
+    from SpeechRecog.text_to_speech import speak_text, warm_up
+    from SpeechRecog.tts_pipeline import SpeechPipeline
+
     warnings.filterwarnings("ignore")
+    threading.Thread(target=_preload, daemon=True).start()
     llm = build_llm()
+    # render the stock phrases into the TTS cache while we wait for the user
+    threading.Thread(target=warm_up, daemon=True).start()
+    _ready()
     print("Jessica (basic QA). Type 'exit' to quit.")
     while True:
         # q = str(input("You: ").strip())
-        q = listen_microphone()
-        
+        turn = tracer.begin()
+        q = listen_streaming()
+        if not q:
+            tracer.end(turn, cancelled=True)  # nothing heard; still counted in the report
+            continue
+
         if q.lower() in {"exit", "quit", "bye"}:
             print("Jessica: Bye.")
             speak_text("Bye Sir")
+            tracer.end(turn)
             break
         try:
-            ans = ask_jessica(llm, q)
-            print("Jessica:", ans)
-            speak_text(ans)
+            print("Jessica:", end=" ", flush=True)
+            # each finished sentence starts speaking while the rest is generated
+            speech = SpeechPipeline()
+            for token in stream_jessica(llm, q):
+                print(token, end="", flush=True)
+                speech.feed(token)
+            print()
+            speech.close()
         except Exception as e:
             print("Error:", e)
-            
-build_assistant()
+        finally:
+            tracer.end(turn)
+    print(format_report(tracer.summary()))
+
+
+def build_async_assistant():
+    """Overlapped listen / think / speak loop with barge-in (see Core/orchestrator.py)."""
+    import asyncio
+    from Chatbot.build_llm import build_llm
+    from Core.orchestrator import Assistant
+    from Core.tracing import format_report, tracer
+    from SpeechRecog.text_to_speech import warm_up
+
+    warnings.filterwarnings("ignore")
+    threading.Thread(target=_preload, daemon=True).start()
+    llm = build_llm()
+    threading.Thread(target=warm_up, daemon=True).start()
+    _ready()
+    print("Jessica is listening. Say 'bye' to quit; talk over her to interrupt.")
+    assistant = Assistant(llm)
+    try:
+        asyncio.run(assistant.run())
+    except KeyboardInterrupt:
+        pass
+    print("Stage handoff latency:", assistant.handoff_stats())
+    print("Speculation:", assistant.speculation_stats())
+    print(format_report(tracer.summary()))
+
+
+def main():
+    if "--serial" in sys.argv:
+        build_assistant()
+    else:
+        build_async_assistant()
+
+
+if __name__ == "__main__":
+    main()